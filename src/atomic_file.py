@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides atomic writing of output files and directories (temp file/directory, then rename)
+
+Parameters
+----------
+Pathfile of the output file : str
+Suffix of the temp file : str (optional, e.g. .nc for writers which check the extension)
+
+Processing
+----------
+* the temp file/directory is created in the directory of the output (rename on the same file system)
+* the mode of the temp file/directory is set like a file created by open()/mkdir() under the umask
+  of the process (mkstemp/mkdtemp create 0600/0700), e.g. 0644/0755 for shared delivery directories
+* the umask is read once at import
+* on errors the temp file/directory is removed, an existing output is not changed
+
+Returns
+-------
+pathfile of the temp file/directory to write to
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import contextlib
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.atomic')
+
+
+# umask of the process (os.umask sets and returns the umask, the old value is set again)
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+# modes of new files and directories under the umask
+FILE_MODE = 0o666 & ~UMASK
+DIR_MODE = 0o777 & ~UMASK
+
+
+# context of an atomic file: write to the yielded temp file, it is renamed to pathfile at the end
+@contextlib.contextmanager
+def atomic_file(pathfile, suffix=''):
+    dirname = os.path.dirname( os.path.abspath(pathfile) )
+
+    fd, tmp_file = tempfile.mkstemp( dir=dirname, prefix='.tmp_', suffix=suffix )
+    os.close(fd)
+
+    try:
+        yield tmp_file
+
+        os.chmod(tmp_file, FILE_MODE)
+        os.replace(tmp_file, pathfile)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+# context of an atomic directory: fill the yielded temp directory, it replaces output_dir at the end
+@contextlib.contextmanager
+def atomic_dir(output_dir):
+    dirname = os.path.dirname( os.path.abspath(output_dir) )
+
+    tmp_dir = tempfile.mkdtemp( dir=dirname, prefix='.tmp_' )
+
+    try:
+        yield tmp_dir
+
+        os.chmod(tmp_dir, DIR_MODE)
+
+        # replace an old directory
+        if os.path.isdir(output_dir):
+            old_dir = tempfile.mkdtemp( dir=dirname, prefix='.old_' )
+            os.rename( output_dir, os.path.join(old_dir, 'old') )
+            os.rename( tmp_dir, output_dir )
+            shutil.rmtree(old_dir)
+        else:
+            os.rename( tmp_dir, output_dir )
+    finally:
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir)
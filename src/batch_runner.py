@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script reprocesses several missions/instruments in a process pool
+Execution
+---------
+./batch_runner.py -c 'PS122_*' -i tsi_powershot_oceanet scaws1 --workers 8
+./batch_runner.py -c PS122_1 PS122_2 --scaws_args "--sigma 5"
+
+Parameters
+----------
+Mission(s) : str (names or patterns of missions in missions.toml)
+Instrument(s) : str (names or patterns, default all instruments of a mission with a processing script)
+Number of processes : int
+
+Processing
+----------
+* jobs are all combinations of mission/instrument listed in missions.toml
+* camera instruments (tsi_*) are processed via location2TSI, scaws* via reprint_radiation_SCAWS
+* the jobs run in a process pool, the modules (cartopy, scipy, ...) are imported once per worker
+* a failing job does not stop the other jobs
+
+Returns
+-------
+summary of all jobs (status, duration)
+"""
+
+import os
+import sys
+import time
+import shlex
+import fnmatch
+import logging
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import get_toml_config
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.batch')
+
+
+# processing script (module) of instruments, by prefix of the instrument name
+SCRIPTS = {
+    'tsi_'  : 'location2TSI',
+    'scaws' : 'reprint_radiation_SCAWS',
+}
+
+
+# get processing script of an instrument, None if there is no script
+def get_script(instrument):
+    for prefix, script in SCRIPTS.items():
+        if instrument.startswith(prefix):
+            return script
+    return None
+
+
+# list of jobs (script, mission, instrument) of all missions/instruments matching the patterns
+def get_jobs(mission_patterns, instrument_patterns):
+    jobs = []
+
+    for mission in get_toml_config.cfg_missions:
+        if not any( fnmatch.fnmatchcase(mission, pattern) for pattern in mission_patterns ):
+            continue
+
+        for instrument in get_toml_config.cfg_missions[mission].get('instruments', []):
+            if not any( fnmatch.fnmatchcase(instrument, pattern) for pattern in instrument_patterns ):
+                continue
+
+            script = get_script(instrument)
+            if script:
+                jobs.append( (script, mission, instrument) )
+
+    return jobs
+
+
+# setup of a worker process: non interactive plots, log to screen
+def init_worker(loglevel):
+    os.environ['MPLBACKEND'] = 'Agg'
+
+    logger = logging.getLogger('oceanet')
+    logger.setLevel(logging.DEBUG)
+
+    if not logger.handlers:
+        ch = logging.StreamHandler()
+        ch.setLevel( logging.getLevelName(loglevel) )
+        ch.setFormatter( logging.Formatter(fmt='%(asctime)s | %(processName)-16s | %(name)-14s | %(levelname)-8s | %(message)s', datefmt='%Y-%m-%d %H:%M:%S',) )
+        logger.addHandler(ch)
+
+
+# run one job in a worker process, returns (script, mission, instrument, status, duration)
+def run_job(script, mission, instrument, extra_argv):
+    start = time.time()
+
+    try:
+        module = importlib.import_module(script)
+
+        args = module.get_parser().parse_args( ['-c', mission, '-i', instrument] + list(extra_argv) )
+
+        thisdict = {
+          "selected": "mission",
+          "name": mission,
+          "loglevel": args.loglevel
+        }
+        config = get_toml_config.loop( thisdict, logging.getLogger('oceanet') )
+
+        failed = module.main(args, config)
+        status = 'ok' if not failed else 'failed'
+
+    # scripts terminate via quit()/exit() on errors
+    except SystemExit as e:
+        status = 'failed (exit {0})'.format(e.code)
+    except Exception as e:
+        status = 'failed ({0})'.format(repr(e))
+
+    return script, mission, instrument, status, time.time() - start
+
+
+# run all jobs in a process pool
+def run_jobs(jobs, workers, extra_args, loglevel):
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=init_worker, initargs=(loglevel,)) as executor:
+        futures = [ executor.submit(run_job, script, mission, instrument, extra_args[script]) for script, mission, instrument in jobs ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            module_logger.info('Job finished: {1} / {2} ({0}): {3}, {4:.0f} s'.format(*result))
+            results.append(result)
+
+    return results
+
+
+# summary of all jobs
+def log_summary(jobs, results):
+    module_logger.info('Summary of {0} jobs:'.format(len(jobs)))
+
+    order = { job : i for i, job in enumerate(jobs) }
+    for script, mission, instrument, status, duration in sorted(results, key=lambda r: order[(r[0], r[1], r[2])]):
+        module_logger.info('{0:12s} {1:25s} {2:10.0f} s  {3}'.format(mission, instrument, duration, status))
+
+    failed = [ r for r in results if r[3] != 'ok' ]
+    if failed:
+        module_logger.error('{0} / {1} jobs failed'.format(len(failed), len(jobs)))
+
+    return len(failed)
+
+
+#####################################################################################
+if __name__ == "__main__":
+    # execute only if run as a script
+    print(__file__)
+
+    parser = argparse.ArgumentParser(description='Batch processing of oceanet missions.')
+    parser.add_argument('-c', required=True, type=str, nargs='+', dest='missions',
+                    help='Names or patterns of the missions (e.g: PS122_1 or "PS122_*")')
+    parser.add_argument('-i', type=str, nargs='+', default=['*'], dest='instruments',
+                    help='Names or patterns of the instruments (default all instruments of a mission with processing script)')
+    parser.add_argument('--workers', default=os.cpu_count(), type=int, dest='workers',
+                    help="define number of processes (default number of cpus)")
+    parser.add_argument('--tsi_args', default='', type=str, dest='tsi_args',
+                    help="additional arguments for location2TSI (e.g. \"--splitted_output FULL\")")
+    parser.add_argument('--scaws_args', default='', type=str, dest='scaws_args',
+                    help="additional arguments for reprint_radiation_SCAWS (e.g. \"--sigma 5\")")
+    parser.add_argument('--loglevel', default='INFO', dest='loglevel',
+                    help="define loglevel of screen INFO (default) | WARNING | ERROR ")
+    args = parser.parse_args()
+
+    init_worker(args.loglevel)
+
+    jobs = get_jobs(args.missions, args.instruments)
+    if len(jobs) == 0:
+        module_logger.error('No jobs found for missions ' + str(args.missions) + ' and instruments ' + str(args.instruments))
+        sys.exit(1)
+
+    module_logger.info('Start {0} jobs with {1} processes'.format(len(jobs), args.workers))
+
+    extra_args = {
+        'location2TSI' : shlex.split(args.tsi_args),
+        'reprint_radiation_SCAWS' : shlex.split(args.scaws_args),
+    }
+
+    results = run_jobs(jobs, args.workers, extra_args, args.loglevel)
+
+    sys.exit( 1 if log_summary(jobs, results) > 0 else 0 )
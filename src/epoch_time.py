@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides the time representation of both pipelines: int64 nanoseconds since epoch (UTC)
+
+Parameters
+----------
+Times : datetime-like arrays/Series (parsed text) or int64 nanoseconds
+Units of a netcdf time variable : str (e.g. "seconds since 1970-01-01 00:00:00")
+
+Processing
+----------
+* times are carried as numpy int64 arrays from parsing through interpolation, flagging and netcdf encoding,
+  no object (pytz/datetime) passes over the records
+* netcdf time values are computed arithmetically from the units (no netCDF4.date2num over python objects)
+* conversion to strings/timestamps only at the output (txt files, attributes, titles)
+
+Returns
+-------
+int64 nanoseconds since epoch (UTC), time values of netcdf units, strings
+"""
+
+import re
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.epoch_time')
+
+
+# nanoseconds of a second and of a day
+SECOND_NS = 10**9
+DAY_NS = 86400 * SECOND_NS
+
+# nanoseconds of the units of netcdf time variables
+UNIT_NS = {
+    'nanoseconds'  : 1,
+    'microseconds' : 10**3,
+    'milliseconds' : 10**6,
+    'seconds'      : SECOND_NS,
+    'minutes'      : 60 * SECOND_NS,
+    'hours'        : 3600 * SECOND_NS,
+    'days'         : DAY_NS,
+}
+
+
+# int64 nanoseconds (UTC) of datetime-like values (naive values are UTC), int64 values are returned unchanged
+def to_ns(values):
+    # values of a Series/Index are numpy datetime64 (UTC) also for tz-aware data
+    values = np.asarray( getattr(values, 'values', values) )
+
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]').view(np.int64)
+
+    return values.astype(np.int64, copy=False)
+
+
+# int64 nanoseconds of seconds since epoch (e.g. stat mtime)
+def seconds_to_ns(seconds):
+    return np.round( np.asarray(seconds, dtype=np.float64) * SECOND_NS ).astype(np.int64)
+
+
+# seconds (float64) relative to a reference time, e.g. time axis of an interpolation
+def to_seconds(times, reference=0):
+    return ( to_ns(times) - np.int64(reference) ) / SECOND_NS
+
+
+# midnight (UTC) of the day of the times
+def floor_day(times):
+    times = to_ns(times)
+    return times - times % DAY_NS
+
+
+# tz-aware (UTC) timestamp of one time, for output only
+def to_timestamp(time):
+    return pd.Timestamp( int(time), tz='UTC' )
+
+
+# numpy datetime64 (UTC) of times, for the axis of plots
+def to_datetime64(times):
+    return to_ns(times).view('datetime64[ns]')
+
+
+# formatted strings of times, for output only
+def to_string(times, format='%Y-%m-%dT%H:%M:%S %z'):
+    return pd.to_datetime( to_ns(times), utc=True ).strftime(format)
+
+
+# factor (nanoseconds of a unit) and epoch (int64 nanoseconds) of netcdf time units "<unit> since <datetime>"
+def parse_time_units(units):
+    m = re.match(r'^\s*(\w+)\s+since\s+(.+?)\s*$', units)
+    if not m or m.group(1).lower() not in UNIT_NS:
+        raise ValueError('Unsupported time units: ' + units)
+
+    reference = pd.Timestamp( m.group(2) )
+    if reference.tzinfo is not None:
+        reference = reference.tz_convert('UTC').tz_localize(None)
+
+    return UNIT_NS[ m.group(1).lower() ], np.int64( reference.value )
+
+
+# netcdf time values (float64) of int64 nanoseconds
+def ns_to_time_values(times, units):
+    factor, epoch = parse_time_units(units)
+
+    return ( to_ns(times) - epoch ) / factor
+
+
+# int64 nanoseconds of netcdf time values, whole units are converted exactly (no float rounding of large values)
+def time_values_to_ns(values, units):
+    factor, epoch = parse_time_units(units)
+
+    values = np.asarray(values, dtype=np.float64)
+    whole = np.floor(values)
+
+    return whole.astype(np.int64) * factor + np.round( (values - whole) * factor ).astype(np.int64) + epoch
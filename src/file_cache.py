@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides binary cache files of parsed text files (e.g. mastertrack, SCAWS daily files)
+
+Parameters
+----------
+Pathfile of the source file : str
+Cache directory : str (optional, default directory of the source file)
+Suffix of the cache file : str
+
+Processing
+----------
+* the name of the cache file contains the name, size and mtime of the source file:
+  <cache_dir>/.<basename>.<size>_<mtime_ns><suffix>
+* a changed source file gets a new cache file name, old cache files of the source are removed
+* cache files are written atomically (atomic_file: temp file, then rename, mode under the umask)
+
+Returns
+-------
+pathfile of the cache file
+"""
+
+import os
+import glob
+import logging
+
+import numpy as np
+
+import atomic_file
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.cache')
+
+
+# get pathfile of the cache file of a source file, the key is path, size and mtime of the source
+def get_cache_file(source_pathfile, suffix, cache_dir=None):
+    st = os.stat(source_pathfile)
+
+    if cache_dir is None:
+        cache_dir = os.path.dirname( os.path.abspath(source_pathfile) )
+
+    return os.path.join( cache_dir, '.{0}.{1}_{2}{3}'.format( os.path.basename(source_pathfile), st.st_size, st.st_mtime_ns, suffix ) )
+
+
+# remove cache files of previous versions of the source file
+def remove_stale_cache_files(cache_file, source_pathfile, suffix):
+    pattern = os.path.join( os.path.dirname(cache_file), '.' + glob.escape( os.path.basename(source_pathfile) ) + '.*' + suffix )
+
+    for old_cache_file in glob.glob(pattern):
+        if old_cache_file != cache_file:
+            module_logger.debug('Remove stale cache file: ' + old_cache_file)
+            try:
+                os.remove(old_cache_file)
+            except OSError:
+                pass
+
+
+# write a numpy array (.npy) or a dict of arrays (.npz) atomically
+# returns False if the cache file is not writable
+def write_cache_file(cache_file, source_pathfile, suffix, data):
+    try:
+        os.makedirs( os.path.dirname(cache_file), exist_ok=True )
+
+        with atomic_file.atomic_file(cache_file, suffix=suffix) as tmp_file:
+            with open(tmp_file, 'wb') as f:
+                if isinstance(data, dict):
+                    np.savez(f, **data)
+                else:
+                    np.save(f, data)
+    except OSError as e:
+        module_logger.warning('Cache file not writable: ' + cache_file + ' (' + str(e) + ')')
+        return False
+
+    module_logger.info('Write cache file: ' + cache_file)
+    remove_stale_cache_files(cache_file, source_pathfile, suffix)
+
+    return True
@@ -130,6 +130,11 @@ def get_missions( instrument_of_interest, logger ):
     return nested_dict
     
     
+# path pattern of the level0 files of an instrument for a date (expression path_filenames_level0 of instruments.toml)
+def get_level0_pattern(instrument, date):
+    return instrument["path_level0_fix"] + eval( instrument["path_filenames_level0"] )
+
+
 def add_instrument_pathfilenames(args, cfg):
     # get _dates from mission
     if (args["selected"] == "mission"):
@@ -153,7 +158,7 @@ def add_instrument_pathfilenames(args, cfg):
                                 # iteration via all dates
                                 for date in dates:
                                     try:
-                                        path_filename = cfg["instruments"][i][key2]["path_level0_fix"] + eval( cfg["instruments"][i][key2]["path_filenames_level0"] )
+                                        path_filename = get_level0_pattern( cfg["instruments"][i][key2], date )
                                         #print(path_filename)
                                         path_filenames_level0.append(path_filename)
                                     except:
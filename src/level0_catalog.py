@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides a persistent catalog (sqlite) of the level0 files of an instrument/mission
+
+Parameters
+----------
+Catalog file : str (e.g. level0_catalog.sqlite in the level1a directory of the instrument)
+Mission : str
+Instrument :str
+List of daily level0 path patterns : list (the _path_filenames_level0 of an instrument)
+
+Processing
+----------
+* stat the directories of all path patterns (concurrently)
+* path patterns with unchanged directory mtime are taken from the catalog
+* only directories with changed mtime are rescanned via level0_walker, files are stat'ed (size, mtime)
+* optional the exposure time is parsed by a function of the caller and stored as int64 nanoseconds
+* CAUTION: the mtime of a directory changes if files are added/removed/renamed, NOT if a file is modified in place
+
+Returns
+-------
+rows of files (pattern, path, size, mtime_ns, exposure_ns) of a mission/instrument via an indexed query, optional restricted to a list of path patterns
+"""
+
+import os
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import level0_walker
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.catalog')
+
+
+CATALOG_FILENAME = 'level0_catalog.sqlite'
+
+# path patterns per query (sqlite limits the number of variables of a statement)
+MAX_SQL_VARIABLES = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patterns (
+    mission     TEXT NOT NULL,
+    instrument  TEXT NOT NULL,
+    pattern     TEXT NOT NULL,
+    dirname     TEXT NOT NULL,
+    dir_mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (mission, instrument, pattern)
+);
+CREATE TABLE IF NOT EXISTS files (
+    mission     TEXT NOT NULL,
+    instrument  TEXT NOT NULL,
+    pattern     TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    exposure_ns INTEGER,
+    PRIMARY KEY (mission, instrument, path)
+);
+CREATE INDEX IF NOT EXISTS files_mission_instrument_pattern ON files (mission, instrument, pattern, path);
+"""
+
+
+# get pathfile of the catalog in the level1a directory of the instrument
+def get_catalog_file(instrument):
+    return os.path.join( instrument["path_level1a_csv"], CATALOG_FILENAME )
+
+
+# open/create the catalog
+def open_catalog(catalog_file):
+    module_logger.info('Open level0 catalog: ' + catalog_file)
+
+    connection = sqlite3.connect(catalog_file)
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+# mtime of a directory in nanoseconds, None if the directory not exists
+def get_dir_mtime_ns(dirname):
+    try:
+        return os.stat(dirname).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+# update the catalog for a mission/instrument, rescan only directories with changed mtime
+# parse_exposure(files, st_mtimes) -> (exposure_ns, valid) is optional to store the exposure time
+def update_catalog(connection, mission, instrument, path_filenames_level0, max_workers=8, parse_exposure=None):
+
+    path_filenames_level0 = list(path_filenames_level0)
+    dirnames = sorted( set( os.path.dirname(p) for p in path_filenames_level0 ) )
+
+    # stat all directories concurrently
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        dir_mtimes = dict( zip( dirnames, executor.map(get_dir_mtime_ns, dirnames) ) )
+
+    known = dict( connection.execute(
+        'SELECT pattern, dir_mtime_ns FROM patterns WHERE mission = ? AND instrument = ?', (mission, instrument) ).fetchall() )
+
+    changed = []
+    for path_filename_level0 in path_filenames_level0:
+        dir_mtime_ns = dir_mtimes[ os.path.dirname(path_filename_level0) ]
+
+        if dir_mtime_ns is None:
+            module_logger.warning('Data sub-directory not exists: ' + os.path.dirname(path_filename_level0))
+            if path_filename_level0 in known:
+                delete_pattern(connection, mission, instrument, path_filename_level0)
+            continue
+
+        if known.get(path_filename_level0) != dir_mtime_ns:
+            changed.append(path_filename_level0)
+
+    module_logger.info('Level0 catalog {0}/{1}: {2} of {3} path patterns changed, rescan'.format(
+        mission, instrument, len(changed), len(path_filenames_level0)))
+
+    # rescan changed directories, stat of all files is done in the walker threads
+    walker = level0_walker.walk_level0( changed, max_workers=max_workers, prefetch_stat=lambda name: True )
+
+    for path_filename_level0, entries in walker:
+        dirname = os.path.dirname(path_filename_level0)
+
+        delete_pattern(connection, mission, instrument, path_filename_level0)
+
+        if entries is None:
+            continue
+
+        files = [ entry.path for entry in entries ]
+        stats = [ entry.stat() for entry in entries ]
+
+        if parse_exposure:
+            exposure_ns, valid = parse_exposure( files, np.array( [ st.st_mtime for st in stats ], dtype=float ) )
+            exposure_ns = [ int(ns) if ok else None for ns, ok in zip(exposure_ns, valid) ]
+        else:
+            exposure_ns = [ None ] * len(files)
+
+        connection.executemany(
+            'INSERT INTO files (mission, instrument, pattern, path, size, mtime_ns, exposure_ns) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [ (mission, instrument, path_filename_level0, f, st.st_size, st.st_mtime_ns, ns) for f, st, ns in zip(files, stats, exposure_ns) ] )
+
+        connection.execute(
+            'INSERT INTO patterns (mission, instrument, pattern, dirname, dir_mtime_ns) VALUES (?, ?, ?, ?, ?)',
+            (mission, instrument, path_filename_level0, dirname, dir_mtimes[dirname]) )
+
+    connection.commit()
+
+    return connection
+
+
+# remove a path pattern and its files from the catalog
+def delete_pattern(connection, mission, instrument, path_filename_level0):
+    connection.execute('DELETE FROM files WHERE mission = ? AND instrument = ? AND pattern = ?', (mission, instrument, path_filename_level0))
+    connection.execute('DELETE FROM patterns WHERE mission = ? AND instrument = ? AND pattern = ?', (mission, instrument, path_filename_level0))
+
+
+# get all files of a mission/instrument, ordered by pattern (date order) and path
+# optional only the files of the given path patterns (e.g. the days of an update run), restricted in the query (index)
+def get_files(connection, mission, instrument, path_filenames_level0=None):
+    query = 'SELECT pattern, path, size, mtime_ns, exposure_ns FROM files WHERE mission = ? AND instrument = ?'
+    
+    if path_filenames_level0 is None:
+        return connection.execute( query + ' ORDER BY pattern, path', (mission, instrument) ).fetchall()
+    
+    # sorted patterns in chunks (limit of the number of sql variables), the chunks keep the order
+    patterns = sorted( set(path_filenames_level0) )
+    
+    rows = []
+    for start in range(0, len(patterns), MAX_SQL_VARIABLES):
+        chunk = patterns[start:start + MAX_SQL_VARIABLES]
+        rows.extend( connection.execute(
+            query + ' AND pattern IN ({0}) ORDER BY pattern, path'.format( ', '.join( '?' * len(chunk) ) ),
+            [mission, instrument] + chunk ).fetchall() )
+    
+    return rows
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides a walker over the daily level0 directories of an instrument
+
+Parameters
+----------
+List of daily level0 path patterns : list (the _path_filenames_level0 of an instrument)
+Number of threads : int
+
+Processing
+----------
+* group the path patterns by their directory, every directory is scanned only once
+* scan the directories concurrently in a bounded thread pool via os.scandir
+* match the file names of each directory against the pattern (like glob)
+* optional stat of selected entries already in the thread pool (DirEntry caches the stat result)
+
+Returns
+-------
+generator of (path_filename_level0, entries) in the order of the path patterns,
+entries is a list of os.DirEntry sorted by path or None if the directory not exists
+"""
+
+import os
+import fnmatch
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.walker')
+
+
+# scan one directory, return all file entries or None if the directory not exists
+# a PermissionError is raised to the caller (no read access to path)
+def scan_directory(dirname, prefetch_stat=None):
+    try:
+        with os.scandir(dirname) as it:
+            entries = [entry for entry in it if entry.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    # stat the entries in the worker thread, the result is cached by DirEntry
+    if prefetch_stat:
+        for entry in entries:
+            if prefetch_stat(entry.name):
+                entry.stat()
+
+    return entries
+
+
+# select entries of a scanned directory matching the filename pattern, sorted like glob + sorted
+def match_entries(entries, filename_pattern):
+    if entries is None:
+        return None
+
+    # glob does not return hidden files if the pattern does not start with a dot
+    hidden = filename_pattern.startswith('.')
+
+    matched = [entry for entry in entries
+               if fnmatch.fnmatchcase(entry.name, filename_pattern) and (hidden or not entry.name.startswith('.'))]
+
+    return sorted(matched, key=lambda entry: entry.path)
+
+
+# walk through the level0 path patterns, scan the directories concurrently
+# and stream the results back in the order of the path patterns (date order)
+def walk_level0(path_filenames_level0, max_workers=8, prefetch_stat=None):
+
+    path_filenames_level0 = list(path_filenames_level0)
+
+    # count usage of each directory, SCAWS files of a year share the same directory
+    remaining = {}
+    for path_filename_level0 in path_filenames_level0:
+        dirname = os.path.dirname(path_filename_level0)
+
+        if any(c in dirname for c in '*?['):
+            raise ValueError('Wildcards are only supported in the file name of a level0 path: ' + path_filename_level0)
+
+        remaining[dirname] = remaining.get(dirname, 0) + 1
+
+    # bounded number of directories scanned ahead of the consumer
+    max_ahead = 2 * max(1, max_workers)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+        pending = deque()
+        position = 0
+
+        while position < len(path_filenames_level0) or pending:
+
+            # submit scans ahead
+            while position < len(path_filenames_level0) and len(futures) < max_ahead:
+                path_filename_level0 = path_filenames_level0[position]
+                dirname = os.path.dirname(path_filename_level0)
+
+                if dirname not in futures:
+                    futures[dirname] = executor.submit(scan_directory, dirname, prefetch_stat)
+
+                pending.append(path_filename_level0)
+                position = position + 1
+
+            # yield the next result in order
+            path_filename_level0 = pending.popleft()
+            dirname = os.path.dirname(path_filename_level0)
+            entries = futures[dirname].result()
+
+            remaining[dirname] = remaining[dirname] - 1
+            if remaining[dirname] == 0:
+                del futures[dirname]
+
+            yield path_filename_level0, match_entries(entries, os.path.basename(path_filename_level0))
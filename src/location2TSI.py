@@ -5,6 +5,7 @@
 Execution
 ---------
 ./location2TSI.py -c PS95 -i tsi
+./location2TSI.py -c PS122_3 -i all   (all camera instruments of the cruise in one run)
 
 Parameters
 ----------
@@ -30,36 +31,118 @@ a csv file to publishing via pangaea.de
 
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timezone, timedelta
-from scipy.interpolate import interp1d
 import matplotlib.pyplot as plt
-import glob
 import re
 import os
 import sys
 import platform
+import io
+import json
+import time
+import sqlite3
+import itertools
 from stat import *
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import pytz
+# optional, pip install inotify_simple (otherwise polling in watch mode)
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
 
 import get_toml_config
-import zipfile
-
+import level0_walker
+import level0_catalog
+import track_interpol
+import file_cache
+import epoch_time
+import plot_decimate
+import pic_archive
+import atomic_file
 
 
 
 """ Create logger, name important """
 module_logger = logging.getLogger('oceanet.tsi')
 
+# image file name hhmmss_NNNN, e.g. 002136_0001.JPG
+FILENAME_TIME_PATTERN = re.compile(r'^(\d{2})(\d{2})(\d{2})_\d{4}')
+
+# instruments of a mission processed by "-i all"
+CAMERA_INSTRUMENT_PREFIX = 'tsi_'
+
+# set timezones
+timezoneCET = pytz.timezone("CET")
+timezoneUTC = pytz.timezone("UTC")
+
+# suffix of the cache file of the parsed mastertrack
+TRACK_CACHE_SUFFIX = '.track.npy'
+
+
+# read location track, the parsed track is cached next to the track file (int64 epoch, Latitude, Longitude)
+# the cache file is keyed by path, size and mtime of the track file and loaded via memory-mapping
+def read_my_file(track_pathfile, use_cache=True):
+    module_logger.info('Read Polarstern track: ' + track_pathfile)
+    
+    cache_file = file_cache.get_cache_file(track_pathfile, TRACK_CACHE_SUFFIX)
+    
+    df = None
+    if use_cache and os.path.isfile(cache_file):
+        df = read_track_cache_file(cache_file)
+    
+    if df is None:
+        df = parse_track_file(track_pathfile)
+        
+        if use_cache:
+            track = np.empty(len(df), dtype=[('time', np.int64), ('Latitude', np.float64), ('Longitude', np.float64)])
+            track['time'] = df['DateTime [UTC]'].values
+            track['Latitude'] = df['Latitude'].values
+            track['Longitude'] = df['Longitude'].values
+            file_cache.write_cache_file(cache_file, track_pathfile, TRACK_CACHE_SUFFIX, track)
+
+    ## get first DatTime (int64 nanoseconds)
+    df_firstdate = df['DateTime [UTC]'][0]
+
+    ## seconds since first DateTime, to use as time axis for interpolation
+    df['diff_seconds'] = epoch_time.to_seconds(df['DateTime [UTC]'], df_firstdate)
+    
+    return df, df_firstdate
+
 
-# read location track
+# read the parsed track from the cache file, None if the cache file is not readable
+# a truncated/corrupt cache file (or of another numpy version) is removed, the track is parsed again
+def read_track_cache_file(cache_file):
+    module_logger.info('Read Polarstern track from cache file: ' + cache_file)
+    
+    try:
+        track = np.load(cache_file, mmap_mode='r')
+        
+        df = pd.DataFrame({
+            'DateTime [UTC]' : np.asarray(track['time']),
+            'Latitude'       : np.asarray(track['Latitude']),
+            'Longitude'      : np.asarray(track['Longitude']),
+        })
+    except (OSError, ValueError, IndexError) as e:
+        module_logger.warning('Cache file not readable, parse track file: ' + cache_file + ' (' + str(e) + ')')
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
+        return None
+    
+    return df
+
+
+# parse location track (pangaea tab/txt)
 # https://www.datacamp.com/community/tutorials/pandas-read-csv
 # https://realpython.com/python-csv/
-def read_my_file(track_pathfile):
-    module_logger.info('Read Polarstern track: ' + track_pathfile)
+def parse_track_file(track_pathfile):
     
     filename, file_extension = os.path.splitext(track_pathfile)
     
@@ -108,91 +191,214 @@ def read_my_file(track_pathfile):
         exit()
 
     ## convert to timestamp and add new column if not exists
-    df['DateTime [UTC]'] = pd.to_datetime(df[df_date_time_column_name])
-    # set timezone
-    df['DateTime [UTC]'] = df['DateTime [UTC]'].dt.tz_localize(pytz.timezone('UTC'))
-
-    ## get first DatTime
-    df_firstdate = df['DateTime [UTC]'][0]
-
-
-    # compute list of timedelta
-    local_timedelta = df['DateTime [UTC]'] - df_firstdate
-
-    ## transform dattime to seconds, to use as time axis for interpolation
-    df['diff_seconds'] = local_timedelta.dt.total_seconds()
+    # DateTime (UTC) as int64 nanoseconds
+    df['DateTime [UTC]'] = epoch_time.to_ns( pd.to_datetime(df[df_date_time_column_name]) )
     
-    return df, df_firstdate
+    return df[['DateTime [UTC]', 'Latitude', 'Longitude']].reset_index(drop=True)
 
 
 
 
 # compute interpolation parameters for Lat and Lon
-# https://docs.scipy.org/doc/scipy/reference/tutorial/interpolate.html
-def get_interpol_parameters(df):
+# local cubic Hermite segments via binary search, no global spline over the whole mastertrack
+# positions within track gaps larger than max_gap seconds are masked (NaN)
+def get_interpol_parameters(df, max_gap=None):
     module_logger.info('Compute interpolation parameters of DataFrame lat lon')
-    f2_lat = interp1d(df['diff_seconds'], df['Latitude'], kind='cubic')
-    f2_lon = interp1d(df['diff_seconds'], df['Longitude'], kind='cubic')
+    f2_lat = track_interpol.local_cubic_interpolator(df['diff_seconds'], df['Latitude'], max_gap=max_gap)
+    f2_lon = track_interpol.local_cubic_interpolator(df['diff_seconds'], df['Longitude'], max_gap=max_gap)
     
     return f2_lat, f2_lon
     
 
-# get datetime of image file
-# 1. time from filename if filename = 002136_0001.JPG please use 00 time as hour, 21 as minutes, 36 as seconds, and date use from folder name 
-# 2. datetime from stat mtime
-def get_exposure_datetime(pathfile):
+# get exposure datetimes of all image files of a day directory at once
+# 1. files hhmmss_NNNN.JPG: one vectorized str.extract for the time, date from directory name
+#    if filename = 002136_0001.JPG please use 00 time as hour, 21 as minutes, 36 as seconds, and date use from folder name
+# 2. all other files and files with an impossible time (e.g. 250000_0003.JPG): datetime from stat mtime
+# returns int64 nanoseconds since epoch (UTC) and a mask of files with a traceable datetime
+def get_exposure_datetimes(pathfiles, dir_lasts, basenames, st_mtimes=None):
+    
+    exposure_ns = np.zeros(len(pathfiles), dtype=np.int64)
+    valid = np.zeros(len(pathfiles), dtype=bool)
+    
+    if len(pathfiles) == 0:
+        return exposure_ns, valid
+    
+    # date from directoryname, midnight UTC as int64 nanoseconds
+    date_ns = epoch_time.to_ns( pd.to_datetime(pd.Series(dir_lasts, dtype=object), format='%Y-%m-%d', utc=True) )
+    
+    # time 00:21:36 from imagename :  002136_0001.JPG
+    hhmmss = pd.Series(basenames, dtype=object).str.extract(FILENAME_TIME_PATTERN.pattern).astype(float).values
+    hh, mm, ss = hhmmss[:,0], hhmmss[:,1], hhmmss[:,2]
+    
+    matched = (hh < 24) & (mm < 60) & (ss < 60)   # NaN compares False = no match
+    seconds_of_day = hh[matched] * 3600 + mm[matched] * 60 + ss[matched]
+    
+    exposure_ns[matched] = date_ns[matched] + seconds_of_day.astype(np.int64) * 1000000000
+    valid[matched] = True
+    
+    # datetime is taken from file stat mtime, only for the files without valid hhmmss_NNNN name
+    # example PS95 stat 2015-10-29/20151029_234413_2307.JPG = Modify: 2015-10-30 00:48:15.000000000 +0100
+    # the local time of the mtime is used as UTC (as datetime.fromtimestamp)
+    for i in np.flatnonzero(~matched):
+        if st_mtimes is not None and not np.isnan(st_mtimes[i]):
+            st_mtime = st_mtimes[i]
+        else:
+            # stat not done within the scan (name matches hhmmss_NNNN, but impossible time)
+            try:
+                st_mtime = os.stat(pathfiles[i]).st_mtime
+            except OSError:
+                continue
         
-    basename=os.path.basename(pathfile)
+        exposure_ns[i] = epoch_time.seconds_to_ns( st_mtime + time.localtime(st_mtime).tm_gmtoff )
+        valid[i] = True
     
-    dir_last = os.path.dirname(pathfile).split('/')[-1]
-    date_from_dir = datetime.strptime(dir_last, '%Y-%m-%d')
-    # set timezone to UTC
-    date_from_dir = timezoneUTC.localize(date_from_dir)
+    # check if directory date and stat mtime differ by more than 24h
+    far = valid & ~matched & ( np.abs(exposure_ns - date_ns) > epoch_time.DAY_NS )
+    for i in np.flatnonzero(far):
+        module_logger.warning('DateTime diff between directorydate ' + dir_lasts[i] + ' and file mtime > 1 day: ' + pathfiles[i])
     
-    exposure_datetime = None
+    return exposure_ns, valid
 
 
-    # time 00:21:36 from imagename :  002136_0001.JPG
-    # date from directoryname
-    if re.match("^\d{6}_\d{4}", basename): #hhmmss_0001
-        m = re.search('^(\d{6})_\d{4}', basename)
-        time_from_filename = m.group(1) # cause 0 = whole string
-        
-        exposure_datetime = datetime.strptime(date_from_dir.strftime("%Y-%m-%d") + ' ' + time_from_filename, '%Y-%m-%d %H%M%S')
-        
-        # set timezone to UTC
-        exposure_datetime = timezoneUTC.localize(exposure_datetime)
-        #module_logger.debug('Image DateTime: time is taken from filename and Date is taken from directoryname')
-        
-        
-    # datetime is taken from file stat mtime    
-    else:
-        # get time from stat
-        # example PS95 stat 2015-10-29/20151029_234413_2307.JPG = Modify: 2015-10-30 00:48:15.000000000 +0100
-        # file was modified in timezone CET
-        exposure_datetime = os.stat(pathfile).st_mtime
-        exposure_datetime = datetime.fromtimestamp( exposure_datetime )#, tz=timezone.utc)
+# collect the image metadata of one day directory as typed arrays
+# DataFrame.append per image copies the whole frame (quadratic run time), so the
+# columns are gathered here and the frame is built only once in build_dfpics
+# st_mtimes (optional) are the stat mtimes of the files already known from the directory scan, NaN if unknown
+def collect_dfpics_day(files, st_mtimes=None):
+    pathfiles, dir_lasts, basenames = split_pathfiles(files)
+    
+    exposure_ns, valid = get_exposure_datetimes(pathfiles, dir_lasts, basenames, st_mtimes)
+    
+    return dfpics_day_arrays(pathfiles, dir_lasts, basenames, exposure_ns, valid)
+
+
+# arrays of pathfile, name of directory and basename
+def split_pathfiles(files):
+    pathfiles = np.asarray( files, dtype=object )
+    dir_lasts = np.asarray( [ os.path.basename( os.path.dirname(pathfile) ) for pathfile in files ], dtype=object )
+    basenames = np.asarray( [ os.path.basename(pathfile) for pathfile in files ], dtype=object )
+    
+    return pathfiles, dir_lasts, basenames
+
+
+# exposure datetime of image files as int64 nanoseconds, used by the level0 catalog
+def parse_exposure_ns(files, st_mtimes):
+    pathfiles, dir_lasts, basenames = split_pathfiles(files)
+    
+    return get_exposure_datetimes(pathfiles, dir_lasts, basenames, st_mtimes)
+
+
+# arrays of one day, only files with traceable exposure datetime
+def dfpics_day_arrays(pathfiles, dir_lasts, basenames, exposure_ns, valid):
+    
+    for pathfile in pathfiles[~valid]:
+        module_logger.warning('No exposure datetime traceable: ' + pathfile )
+    
+    return {
+        'exposure_ns' : exposure_ns[valid],
+        'dir_last'    : dir_lasts[valid],
+        'basename'    : basenames[valid],
+        'pathfile'    : pathfiles[valid],
+    }
+
+
+# create dfpics from the arrays of all days in one step
+def build_dfpics(dfpics_days):
+    
+    columns = {}
+    for key in ['exposure_ns', 'dir_last', 'basename', 'pathfile']:
+        if len(dfpics_days) > 0:
+            columns[key] = np.concatenate( [ day[key] for day in dfpics_days ] )
+        else:
+            columns[key] = np.array( [], dtype=np.int64 if key == 'exposure_ns' else object )
+    
+    basename = pd.Series(columns['basename'], dtype=object)
+    
+    # DateTime (UTC) as int64 nanoseconds, formatted only for the name of the VirtualFile
+    dfpics = pd.DataFrame({
+        'DateTime [UTC]' : columns['exposure_ns'],
+        'File'           : pd.Series(columns['dir_last'], dtype=object) + "/" + basename,
+        'FileFullPath'   : columns['pathfile'],
+        'VirtualFile'    : pd.Series(epoch_time.to_string(columns['exposure_ns'], "%Y%m%d_%H%M%S_"), dtype=object) + basename,
+    })
+    
+    return dfpics
+
+
+# scan the level0 directories of the instrument, collect image metadata as arrays per day
+def scan_dfpics_days(args, instrument):
+    
+    dfpics_days = []
+    
+    # iteration, the daily directories are scanned concurrently and returned in date order
+    # the stat of files without hhmmss_NNNN name is done within the scan (mtime fallback)
+    walker = level0_walker.walk_level0( instrument["_path_filenames_level0"], max_workers=args.scan_workers, prefetch_stat=lambda name: not FILENAME_TIME_PATTERN.match(name) )
+    
+    try:
+        for path_filename_level0, entries in walker:
+            
+            # check if directory exists
+            if entries is None:
+                module_logger.warning('Data sub-directory not exists: ' + os.path.dirname(path_filename_level0))
+                continue
+            
+            files = [ entry.path for entry in entries ]
+            st_mtimes = np.array( [ np.nan if FILENAME_TIME_PATTERN.match(entry.name) else entry.stat().st_mtime for entry in entries ], dtype=float )
+            
+            module_logger.info('Found {0:4d} image files in directory {1:20s}'.format(len(files), path_filename_level0) )
+            
+            dfpics_days.append( collect_dfpics_day(files, st_mtimes) )
+    
+    # check is direcoty is readable
+    except PermissionError as e:
+        module_logger.warning("No read access to path: " + str(e.filename))
+        quit()
+    
+    return dfpics_days
+
+
+# get image metadata per day from the persistent level0 catalog, only changed directories are rescanned
+def catalog_dfpics_days(args, instrument):
+    
+    catalog_file = level0_catalog.get_catalog_file(instrument)
+    
+    try:
+        connection = level0_catalog.open_catalog(catalog_file)
+    except sqlite3.Error as e:
+        module_logger.error('Level0 catalog not usable: ' + catalog_file + ' (' + str(e) + ')')
+        quit()
+    
+    try:
+        level0_catalog.update_catalog(connection, args.cruise, args.instrument, instrument["_path_filenames_level0"], max_workers=args.scan_workers, parse_exposure=parse_exposure_ns)
+    
+    # check is direcoty is readable
+    except PermissionError as e:
+        module_logger.warning("No read access to path: " + str(e.filename))
+        quit()
+    
+    # files of the current path patterns only (patterns of other runs stay in the catalog)
+    rows = level0_catalog.get_files(connection, args.cruise, args.instrument, instrument["_path_filenames_level0"])
+    connection.close()
+    
+    dfpics_days = []
+    
+    # rows are ordered by path pattern (date order)
+    for path_filename_level0, group in itertools.groupby(rows, key=lambda row: row[0]):
+        group = list(group)
         
-        # set timezone to CET
-        #exposure_datetime = timezoneCET.localize(exposure_datetime)
-        # set timezone to UTC = rsd2
-        exposure_datetime = timezoneUTC.localize(exposure_datetime)
+        pathfiles, dir_lasts, basenames = split_pathfiles( [ row[1] for row in group ] )
+        valid = np.array( [ row[4] is not None for row in group ], dtype=bool )
+        exposure_ns = np.array( [ row[4] if row[4] is not None else 0 for row in group ], dtype=np.int64 )
         
-        # check if directory date if less equal than 24h than stst mtime
-        d =  exposure_datetime - date_from_dir
-        if abs( d.seconds ) > 24*60*60:
-            module_logger.error('DateTime diff between directorydate ' +  dir_last + ' and file mtime > 1 day: ' + str(d.seconds) + ' seconds')
-            quit()
-            
-        #module_logger.debug('Image DateTime is taken from file stat mtime')
+        module_logger.info('Found {0:4d} image files in directory {1:20s}'.format(len(pathfiles), path_filename_level0) )
         
-    return dir_last, basename, exposure_datetime
+        dfpics_days.append( dfpics_day_arrays(pathfiles, dir_lasts, basenames, exposure_ns, valid) )
+    
+    return dfpics_days
 
-# find files and sort
-# ! Note: function sorted and glob does'nt return a sorted list, a workaround is required to sort the list of strings
-# files = glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True)
-# files = sorted( glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True), key=os.path.getsize)
-def find_files_to_dfpics(df, args, config):
+
+# create new config dict with two main keys: instrument & mission
+def get_config_singular(args, config):
     
     # get metadata of instrument
     instrument = None  
@@ -205,14 +411,21 @@ def find_files_to_dfpics(df, args, config):
         module_logger.warning('Instrument "' + args.instrument +  '" not exists in misson "' + args.cruise + '".')
         quit()
     
-    # create new config dict with two main keys: instrument & mission
     config_singular = {}
     config_singular["instrument"] = instrument 
     config_singular["mission"] = config["mission"][args.cruise]
+    
+    return config_singular
 
+
+# find files and sort
+# ! Note: function sorted and glob does'nt return a sorted list, a workaround is required to sort the list of strings
+# files = glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True)
+# files = sorted( glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True), key=os.path.getsize)
+def find_files_to_dfpics(df, args, config):
     
-    # get metadata of mission
-    mission = config["mission"][args.cruise]
+    config_singular = get_config_singular(args, config)
+    instrument = config_singular["instrument"]
     
     # check if dir exists
     if not (os.path.isdir(instrument["path_level0_fix"])):
@@ -222,49 +435,14 @@ def find_files_to_dfpics(df, args, config):
         module_logger.info('Find files in directory: ' + instrument["path_level0_fix"])
         
         
-     # add dataframe
-    dfpics = pd.DataFrame(columns=['DateTime [UTC]', 'File'])
-        
-
-    # iteration
-    index=-1
-    for path_filename_level0 in instrument["_path_filenames_level0"]:
-        index=index+1
-        
-        # name of current diretcory
-        dirname = os.path.dirname(path_filename_level0)
-        
-        # check if directory exists
-        if not (os.path.isdir( dirname )):
-            module_logger.warning('Data sub-directory not exists: ' + dirname)
-            continue
-        
-        # check is direcoty is readable       
-        if not (os.access(dirname, os.R_OK)):
-            module_logger.warning("No read access to path: " + dirname)
-            quit()
-        
-        # this test is only for testing the program with less data files
-        if index == 13:
-            #break    # break here
-            ok = 1
-        
-        files = sorted( glob.glob( path_filename_level0, recursive=True), key=os.path.realpath )
-        
-        module_logger.info('Found {0:4d} image files in directory {1:20s}'.format(len(files), path_filename_level0) )
-
-        #https://thispointer.com/python-get-list-of-files-in-directory-sorted-by-name/
-        #files = sorted( filter( os.path.isfile,\
-        #                        glob.glob('/vols/oceanet-archive_chief/OCEANET_DATEN_BACKUP/Test/DATA/WOLKENKAMERA' + '/**/*.JPG', recursive=True) ) )
-
-        for pathfile in files:
-
-            dir_last, basename, exposure_datetime = get_exposure_datetime(pathfile)
-            
-            if exposure_datetime:
-                dfpics = dfpics.append({'DateTime [UTC]': exposure_datetime, 'File' : dir_last + "/" + basename, 'FileFullPath' : pathfile, 'VirtualFile' : exposure_datetime.strftime("%Y%m%d_%H%M%S_") + basename}, ignore_index=True)
-            else:
-                 module_logger.warning('No exposure datetime traceable: ' + pathfile )
+    # collect image metadata as arrays per day, the DataFrame is built once per run
+    if args.catalog:
+        dfpics_days = catalog_dfpics_days(args, instrument)
+    else:
+        dfpics_days = scan_dfpics_days(args, instrument)
+    
+    # build dfpics once from the collected arrays
+    dfpics = build_dfpics(dfpics_days)
     
     # check if images are in the dataframe
     nn = dfpics['DateTime [UTC]'].count()
@@ -274,19 +452,13 @@ def find_files_to_dfpics(df, args, config):
     else:
         module_logger.info('In total ' + str(nn) + ' images were found.')
     
-    # set dfpics timezone to UTC)
-    
-    # convert dfpics to timezone UTC, cause stat mtime has CET timezone
-    dfpics['DateTime [UTC]'] = dfpics['DateTime [UTC]'].dt.tz_convert(pytz.timezone('UTC'))
-    
     # get smallest DT, cause smallest must not be the first element
     # please use df NOT dfpics, cause df is the interpolation bases
     df_firstdate = df['DateTime [UTC]'].min()
 
 
-    # create new timedelta related to first datetime
-    local_timedelta3 = dfpics['DateTime [UTC]'] - df_firstdate
-    dfpics['diff_seconds'] = local_timedelta3.dt.total_seconds()
+    # seconds related to first datetime (int64 nanoseconds of dfpics and df)
+    dfpics['diff_seconds'] = epoch_time.to_seconds(dfpics['DateTime [UTC]'], df_firstdate)
 
     # sort by timedaelta cause list of files seems to be un-sorted
     dfpics = dfpics.sort_values(by='diff_seconds', ascending=True)
@@ -325,15 +497,19 @@ def remove_dfpics_outside(df, dfpics):
 # interpolate lat, lon to dfpics dataframe
 def interpolation_dfpics(dfpics, f2_lat, f2_lon):
     module_logger.info('Compute interpolation of dfpics')
-    dfpics['Latitude'] = f2_lat(dfpics['diff_seconds'])
-    dfpics['Longitude'] = f2_lon(dfpics['diff_seconds'])
+    dfpics['Latitude'] = f2_lat(dfpics['diff_seconds'].values)
+    dfpics['Longitude'] = f2_lon(dfpics['diff_seconds'].values)
     
+    # remove records within gaps of the mastertrack (masked by interpolation)
+    masked = dfpics['Latitude'].isnull() | dfpics['Longitude'].isnull()
+    if masked.sum() > 0:
+        module_logger.warning('{0} records removed, exposure datetime within a gap of the mastertrack (> max_gap)'.format(masked.sum()))
+        dfpics = dfpics[~masked]
     
     # check if NaN exists
     number_nan_values = dfpics.isnull().sum().sum()
     if number_nan_values > 0:
         module_logger.error('Warning, {0} NaN values exists in Dataframe'.format(number_nan_values))
-        module_logger.error('Maybe number of point in mastertrack is to large {0}, interpolation problem?, please use a mastertrack with less resolution!'.format(len(df['Latitude'])))
         quit()
     
     return dfpics
@@ -341,7 +517,7 @@ def interpolation_dfpics(dfpics, f2_lat, f2_lon):
 
 
 # plot track
-def plot_me(df, dfpics, config_singular):
+def plot_me(args, df, dfpics, config_singular):
     
     if not os.path.isdir(config_singular["instrument"]["path_level1a_image"]):
         module_logger.error('Directory to write image not exists: ' + config_singular["instrument"]["path_level1a_image"]  )
@@ -403,12 +579,25 @@ def plot_me(df, dfpics, config_singular):
     #gl.ylabels_left = False
     
 
-    x, y = (df['Longitude'].tolist(), df['Latitude'].tolist() )
+    x, y = (df['Longitude'].values, df['Latitude'].values )
     #m.plot(x, y, 'm+', ms = 1)
 
-    x2, y2 = (dfpics['Longitude'].tolist(), dfpics['Latitude'].tolist() )
+    x2, y2 = (dfpics['Longitude'].values, dfpics['Latitude'].values )
     #m.plot(x, y, 'g|', ms = 3)
     
+    # reduce track and image positions to the pixel resolution of the plot
+    # the track is drawn as markers: one position per pixel (Douglas-Peucker would remove markers along straight legs)
+    if args.plot_decimate:
+        tolerance = plot_decimate.get_pixel_tolerance(10, 200)
+        
+        ok = ~( np.isnan(x) | np.isnan(y) )
+        x, y = x[ok], y[ok]
+        index = plot_decimate.decimate_positions(x, y, tolerance)
+        x, y = x[index], y[index]
+        
+        index = plot_decimate.decimate_positions(x2, y2, tolerance)
+        x2, y2 = x2[index], y2[index]
+    
     ax.plot(x, y, 'm+', ms = 1, label='Cruise mastertrack ', transform=geo)
     ax.plot(x2, y2, 'g|', ms = 3, label='TSI shots', transform=geo)
     legend = ax.legend(shadow=True)
@@ -418,10 +607,11 @@ def plot_me(df, dfpics, config_singular):
     #plt.xlabel('Longitude', labelpad=40)
     
     plt.title(args.cruise)
-    plt.suptitle(str( dfpics['DateTime [UTC]'].iloc[0] )  + ' - ' + str( dfpics['DateTime [UTC]'].iloc[-1] ) + ' UTC', fontsize=10)
+    plt.suptitle(str( epoch_time.to_timestamp( dfpics['DateTime [UTC]'].iloc[0] ) )  + ' - ' + str( epoch_time.to_timestamp( dfpics['DateTime [UTC]'].iloc[-1] ) ) + ' UTC', fontsize=10)
 
     #plt.show()
     fig.savefig(output_file, dpi = 200)
+    plt.close(fig)
     
 
 
@@ -444,37 +634,76 @@ def write_file(args, dfpics, config_singular):
         output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '.txt'
         
         module_logger.info('Write dfpics to file: ' + output_file)
-        dfpics.to_csv(output_file, sep='\t', header=True, index=False, columns=['DateTime [UTC]', 'Latitude', 'Longitude', 'VirtualFile'], float_format='%.5f', date_format='%Y-%m-%dT%H:%M:%S %z')
+        write_txt_file(dfpics, output_file)
         #dfpics.to_csv(output_file, sep='\t', header=True, index=False, columns=['DateTime [UTC]', 'Latitude', 'Longitude', 'File', 'FileFullPath'], float_format='%.5f', date_format='%Y-%m-%dT%H:%M:%S %z')
         #dfpics.to_csv(output_file, sep='\t', header=True, index=False, columns=['DateTime [UTC]', 'Latitude', 'Longitude', 'File'], float_format='%.5f')
     # Start write splitted txt
     elif(args.splitted_output == 'DAILY'):
-        # get DATES without TIMES
-        start_date  = config_singular["mission"]["datetime_start"].replace(hour=0, minute=0, second=0)
-        end_date    = config_singular["mission"]["datetime_stopp"].replace(hour=0, minute=0, second=0)
-        i_date      = start_date.replace(hour=0, minute=0, second=0)
+        dfpics = sort_dfpics(dfpics)
         
-        delta       = timedelta(days=1)
-        
-        # iteration daily
-        while i_date <= end_date:
-            
-            # mask data
-            mask = (dfpics['DateTime [UTC]'] >= i_date) & (dfpics['DateTime [UTC]'] < (i_date + delta) )
-            dfpics_i_date = dfpics.loc[mask]
+        # daily files are written concurrently by a small writer pool
+        with ThreadPoolExecutor(max_workers=args.writer_workers) as executor:
+            futures = []
             
-            
-            # check if data exists
-            if len(dfpics_i_date.index) == 0:
-                module_logger.warning('No data from  ' + str(i_date) + ' - ' + str(i_date + delta) )
-            else:
+            for i_date, first, last in get_daily_slices(dfpics, config_singular):
+                
+                # check if data exists
+                if first == last:
+                    module_logger.warning('No data from  ' + str(i_date) + ' - ' + str(i_date + timedelta(days=1)) )
+                    continue
+                
                 # create txt file
                 output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '_' +  i_date.strftime("%Y-%m-%d") + '.txt'
                 module_logger.info('Write dpics to file: ' + output_file)
-                dfpics_i_date.to_csv(output_file, sep='\t', header=True, index=False, columns=['DateTime [UTC]', 'Latitude', 'Longitude', 'VirtualFile'], float_format='%.5f', date_format='%Y-%m-%dT%H:%M:%S %z')
+                futures.append( executor.submit(write_txt_file, dfpics.iloc[first:last], output_file) )
+            
+            # raise exceptions of the writers
+            for future in futures:
+                future.result()
+
+
+# write records of dfpics to a txt file, mode 'a' appends records (header only for a new file)
+def write_txt_file(dfpics, output_file, mode='w'):
+    header = (mode == 'w') or not os.path.isfile(output_file)
+    
+    # DateTime is converted to strings at the output only
+    dfpics = dfpics.assign( **{ 'DateTime [UTC]' : epoch_time.to_string(dfpics['DateTime [UTC]'], '%Y-%m-%dT%H:%M:%S %z') } )
+    dfpics.to_csv(output_file, mode=mode, sep='\t', header=header, index=False, columns=['DateTime [UTC]', 'Latitude', 'Longitude', 'VirtualFile'], float_format='%.5f')
+
+
+# dfpics sorted by DateTime, normally already sorted by diff_seconds
+def sort_dfpics(dfpics):
+    if not dfpics['DateTime [UTC]'].is_monotonic_increasing:
+        dfpics = dfpics.sort_values(by='DateTime [UTC]', kind='stable')
+    
+    return dfpics
+
+
+# split the sorted dfpics into the days of the mission in one pass via binary search
+# returns list of (date, first row, last row + 1)
+def get_daily_slices(dfpics, config_singular):
+    # get DATES without TIMES
+    start_date  = config_singular["mission"]["datetime_start"].replace(hour=0, minute=0, second=0)
+    end_date    = config_singular["mission"]["datetime_stopp"].replace(hour=0, minute=0, second=0)
+    i_date      = start_date.replace(hour=0, minute=0, second=0)
+    
+    delta       = timedelta(days=1)
+    
+    dates = []
+    while i_date <= end_date:
+        dates.append(i_date)
+        i_date += delta
+    
+    if len(dates) == 0:
+        return []
+    
+    # day boundaries as int64 nanoseconds, rows of a day: boundary[k] <= time < boundary[k+1]
+    boundaries = np.array( [ pd.Timestamp(d).value for d in dates ] + [ pd.Timestamp(dates[-1] + delta).value ], dtype=np.int64 )
+    times = epoch_time.to_ns( dfpics['DateTime [UTC]'] )
+    index = np.searchsorted(times, boundaries, side='left')
+    
+    return [ (dates[k], index[k], index[k+1]) for k in range(len(dates)) ]
 
-            # next loop iteration
-            i_date += delta
 
 # write all related pics to zip
 def write_piczipfile(args, dfpics, config_singular):
@@ -489,54 +718,385 @@ def write_piczipfile(args, dfpics, config_singular):
     if not os.path.isdir( suboutdir ):
         os.mkdir( suboutdir )
     
+    # list of archives: (output_file, image pathfiles, names in archive)
+    jobs = []
+    
     # Start write FULL Zip
     if(args.splitted_output == 'FULL'):
         output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '.zip'
         
-        module_logger.info('Write pics to zip archive: ' + output_file)
-        zf = zipfile.ZipFile(output_file, "w")
-        
-        for index, row in dfpics.iterrows():
-            zf.write(row['FileFullPath'], arcname = row["VirtualFile"])
+        module_logger.info('Write pics to image package (' + args.export + '): ' + pic_archive.get_package_path(output_file, args.export))
+        jobs.append( (output_file, dfpics['FileFullPath'].tolist(), dfpics['VirtualFile'].tolist()) )
             
     # Start write splitted zip
     elif(args.splitted_output == 'DAILY'):
-        # get DATES without TIMES
-        start_date  = config_singular["mission"]["datetime_start"].replace(hour=0, minute=0, second=0)
-        end_date    = config_singular["mission"]["datetime_stopp"].replace(hour=0, minute=0, second=0)
-        i_date      = start_date.replace(hour=0, minute=0, second=0)
+        dfpics = sort_dfpics(dfpics)
         
-        delta       = timedelta(days=1)
-        
-        # iteration daily
-        while i_date <= end_date:
-            
-            # mask data
-            mask = (dfpics['DateTime [UTC]'] >= i_date) & (dfpics['DateTime [UTC]'] < (i_date + delta) )
-            dfpics_i_date = dfpics.loc[mask]
+        for i_date, first, last in get_daily_slices(dfpics, config_singular):
             
             # check if data exists
-            if len(dfpics_i_date.index) == 0:
-                module_logger.warning('No data from  ' + str(i_date) + ' - ' + str(i_date + delta) )
+            if first == last:
+                module_logger.warning('No data from  ' + str(i_date) + ' - ' + str(i_date + timedelta(days=1)) )
+                continue
+            
+            # create zip file
+            output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '_' +  i_date.strftime("%Y-%m-%d") + '.zip'
+            module_logger.info('Write pics to image package (' + args.export + '): ' + pic_archive.get_package_path(output_file, args.export))
+            jobs.append( (output_file, dfpics['FileFullPath'].iloc[first:last].tolist(), dfpics['VirtualFile'].iloc[first:last].tolist()) )
+    
+    # build archives (or directories of links) in a process pool, unchanged packages are skipped
+    failed = pic_archive.build_pic_packages(jobs, export=args.export, max_workers=args.zip_workers, checksum=args.checksum)
+    if failed > 0:
+        module_logger.error('{0} / {1} image packages could not be written'.format(failed, len(jobs)))
+            
+    
+    return
+    
+    
+    
 
-            else:
-                # create zip file
-                output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '_' +  i_date.strftime("%Y-%m-%d") + '.zip'
-                module_logger.info('Write pics to zip archive: ' + output_file)
-                zf = zipfile.ZipFile(output_file, "w")
+# pathfile of the watch state of a day (processed image files of the day)
+def get_watch_state_file(suboutdir, args, day):
+    return suboutdir + '.' + args.cruise.lower() + '_' + args.instrument + '_watch_' + day + '.json'
+
+
+# read the watch states of the open days (one state file per day)
+def read_watch_states(suboutdir, args):
+    prefix = os.path.basename( get_watch_state_file(suboutdir, args, '') )[:-len('.json')]
+    
+    days = {}
+    for name in sorted( os.listdir(suboutdir) ):
+        if name.startswith(prefix) and name.endswith('.json'):
+            day = name[len(prefix):-len('.json')]
+            try:
+                with open( os.path.join(suboutdir, name) ) as f:
+                    days[day] = set( json.load(f) )
+            except (OSError, ValueError) as e:
+                module_logger.warning('Watch state not readable, day is processed again: ' + name + ' (' + str(e) + ')')
+                days[day] = set()
+    
+    return days
+
+
+# write the watch state of a day atomically
+def write_watch_state(state_file, processed):
+    with atomic_file.atomic_file(state_file, suffix='.json') as tmp_file:
+        with open(tmp_file, 'w') as f:
+            json.dump( sorted(processed), f )
+
+
+# date (UTC) of a day string of the watch state
+def get_day_date(day):
+    return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+# column names of the track file (header line after the end of the pangaea header in tab files)
+# and the byte offset of the first record
+def read_track_header(track_pathfile):
+    filename, file_extension = os.path.splitext(track_pathfile)
+    
+    with open(track_pathfile, "rb") as file:
+        line = file.readline()
+        if file_extension == '.tab':
+            while line and not re.search(rb"\*\/", line):
+                line = file.readline()
+            line = file.readline()
+        
+        offset = file.tell()
+    
+    return line.decode().rstrip('\r\n').split('\t'), offset
+
+
+# read the mastertrack in watch mode: complete lines only, a partial last line is read with the next event
+# returns the track, its first DateTime, the column names and the offset after the last complete line
+def load_track(track_pathfile):
+    columns, offset = read_track_header(track_pathfile)
+    
+    df, offset = read_track_increment(track_pathfile, columns, offset)
+    if df is None or len(df) == 0:
+        raise ValueError('no complete record')
+    
+    df = df.reset_index(drop=True)
+    df_firstdate = df['DateTime [UTC]'][0]
+    df['diff_seconds'] = epoch_time.to_seconds(df['DateTime [UTC]'], df_firstdate)
+    
+    return df, df_firstdate, columns, offset
+
+
+# parse the complete lines appended to the track file after offset (growing mastertrack)
+# returns the new records (DateTime [UTC], Latitude, Longitude) and the offset after the last complete line
+def read_track_increment(track_pathfile, columns, offset):
+    with open(track_pathfile, "rb") as file:
+        file.seek(offset)
+        data = file.read()
+    
+    # a partial last line (track file is just written) is read with the next event
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset
+    
+    df = pd.read_csv(io.BytesIO(data[:end]), sep='\t', header=None, names=columns, dtype=str)
+    
+    df_date_time_column_name = [ col for col in columns if 'Date/Time' in col ][0]
+    
+    # malformed lines are skipped
+    df['DateTime [UTC]'] = pd.to_datetime(df[df_date_time_column_name], errors='coerce')
+    df['Latitude'] = pd.to_numeric(df['Latitude'], errors='coerce')
+    df['Longitude'] = pd.to_numeric(df['Longitude'], errors='coerce')
+    
+    number_lines = len(df)
+    df = df[['DateTime [UTC]', 'Latitude', 'Longitude']].dropna().copy()
+    if len(df) < number_lines:
+        module_logger.warning('{0} malformed lines of the track file skipped: {1}'.format( number_lines - len(df), track_pathfile ))
+    
+    df['DateTime [UTC]'] = epoch_time.to_ns(df['DateTime [UTC]'])
+    
+    return df, offset + end
+
+
+# extend the interpolation functions by the new records of the track (records after the end of the track)
+def extend_interpol_parameters(f2_lat, f2_lon, new_df, df_firstdate):
+    diff_seconds = epoch_time.to_seconds(new_df['DateTime [UTC]'], df_firstdate)
+    track_interpol.extend_interpolator(f2_lat, diff_seconds, new_df['Latitude'].values)
+    track_interpol.extend_interpolator(f2_lon, diff_seconds, new_df['Longitude'].values)
+
+
+# interpolate new images of a day and append them to the daily txt file
+# returns the basenames of the handled images, images later than the end of the mastertrack remain pending
+def append_new_images(args, track_first, track_last, f2_lat, f2_lon, entries, output_file):
+    
+    files = [ entry.path for entry in entries ]
+    st_mtimes = np.array( [ np.nan if FILENAME_TIME_PATTERN.match(entry.name) else entry.stat().st_mtime for entry in entries ], dtype=float )
+    
+    day = collect_dfpics_day(files, st_mtimes)
+    
+    # files without traceable exposure datetime are handled too (not retried)
+    handled = set( entry.name for entry in entries ) - set( day['basename'] )
+    
+    dfpics = build_dfpics([day])
+    if len(dfpics) == 0:
+        return handled
+    
+    dfpics['diff_seconds'] = epoch_time.to_seconds(dfpics['DateTime [UTC]'], track_first)
+    dfpics = dfpics.sort_values(by='diff_seconds', ascending=True)
+    
+    # wait for the mastertrack for images later than the end of the track
+    pending = dfpics['DateTime [UTC]'] > track_last
+    ready = dfpics[~pending]
+    handled.update( os.path.basename(pathfile) for pathfile in ready['FileFullPath'] )
+    
+    # images before the start of the track are not located
+    ready = ready[ ready['DateTime [UTC]'] >= track_first ]
+    if len(ready) == 0:
+        return handled
+    
+    ready = interpolation_dfpics(ready, f2_lat, f2_lon)
+    
+    if len(ready) > 0:
+        module_logger.info('Append {0} images to file: {1}'.format(len(ready), output_file))
+        write_txt_file(ready, output_file, mode='a')
+    
+    return handled
+
+
+# near real time mode: watch the level0 directory of the current day (inotify or polling)
+# new images are interpolated against the (growing) mastertrack and appended to the daily txt file
+# the mastertrack is read once, afterwards only the appended complete lines are parsed
+# a past day stays open until its images are handled and the mastertrack covers the day (late writes, rollover)
+# images which can not be appended (e.g. file just written) are retried with the next event
+def watch_level0(args, config):
+    
+    config_singular = get_config_singular(args, config)
+    instrument = config_singular["instrument"]
+    track_pathfile = config_singular["mission"]["track"]
+    
+    # Test if dir exists
+    if not os.path.isdir(instrument["path_level1a_csv"]  ):
+        module_logger.error('Directory to write data not exists: ' + instrument["path_level1a_csv"]  )
+        exit()
+    
+    # Test if subdir exists
+    suboutdir = instrument["path_level1a_csv"] + args.cruise.lower() + "/"
+    if not os.path.isdir( suboutdir ):
+        os.mkdir( suboutdir )
+    
+    # position of the watch mode on disk: processed image files of each open day
+    days = read_watch_states(suboutdir, args)
+    
+    if INotify:
+        inotify = INotify()
+        module_logger.info('Watch level0 directory via inotify')
+    else:
+        inotify = None
+        module_logger.info('Watch level0 directory via polling every {0} seconds'.format(args.watch_interval))
+    
+    watch_descriptor = None
+    watched_dirname = None
+    
+    # mastertrack: interpolation functions, first/last DateTime, inode and offset after the last parsed line
+    f2_lat = None
+    track_inode = None
+    track_offset = 0
+    
+    try:
+        while True:
+            today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            days.setdefault(today, set())
+            
+            # watch directory of the current day
+            dirname = os.path.dirname( get_toml_config.get_level0_pattern(instrument, get_day_date(today)) )
+            if inotify and dirname != watched_dirname and os.path.isdir(dirname):
+                if watch_descriptor is not None:
+                    try:
+                        inotify.rm_watch(watch_descriptor)
+                    except OSError:
+                        pass
+                watch_descriptor = inotify.add_watch(dirname, inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO)
+                watched_dirname = dirname
+                module_logger.info('Watch directory: ' + dirname)
+            
+            # mastertrack, read again if replaced/truncated, otherwise the appended lines only
+            try:
+                st = os.stat(track_pathfile)
                 
-                # fill zip file
-                for index, row in dfpics_i_date.iterrows():
-                    zf.write(row['FileFullPath'], arcname = row["VirtualFile"])
+                if f2_lat is None or st.st_ino != track_inode or st.st_size < track_offset:
+                    df, track_first, track_columns, track_offset = load_track(track_pathfile)
+                    f2_lat, f2_lon = get_interpol_parameters(df, max_gap=args.max_gap)
+                    track_last = df['DateTime [UTC]'].max()
+                    track_inode = st.st_ino
+                    del df
+                
+                elif st.st_size > track_offset:
+                    new_df, track_offset = read_track_increment(track_pathfile, track_columns, track_offset)
+                    
+                    # the interpolation is extended by the appended segment only
+                    if new_df is not None:
+                        new_df = new_df[ new_df['DateTime [UTC]'] > track_last ]
+                        
+                        if len(new_df) > 0:
+                            module_logger.info('Append {0} records to the mastertrack'.format( len(new_df) ))
+                            extend_interpol_parameters(f2_lat, f2_lon, new_df, track_first)
+                            track_last = new_df['DateTime [UTC]'].max()
+            
+            except Exception as e:
+                module_logger.warning('Mastertrack not readable, retry with the next event: ' + track_pathfile + ' (' + str(e) + ')')
             
-            # next loop iteration
-            i_date += delta
+            if f2_lat is not None:
+                for day in sorted(days):
+                    
+                    # new images of the open days
+                    try:
+                        path_filename_level0 = get_toml_config.get_level0_pattern(instrument, get_day_date(day))
+                        entries = level0_walker.match_entries( level0_walker.scan_directory( os.path.dirname(path_filename_level0) ), os.path.basename(path_filename_level0) )
+                        
+                        new_entries = [ entry for entry in entries or [] if entry.name not in days[day] ]
+                        
+                        # the state file of the changed day only
+                        handled = set()
+                        if len(new_entries) > 0:
+                            output_file =  suboutdir + args.cruise.lower() + '_' + args.instrument + '_' +  day + '.txt'
+                            handled = append_new_images(args, track_first, track_last, f2_lat, f2_lon, new_entries, output_file)
+                            
+                            if len(handled) > 0:
+                                days[day].update(handled)
+                                write_watch_state( get_watch_state_file(suboutdir, args, day), days[day] )
+                    
+                    except Exception as e:
+                        module_logger.warning('Images of day {0} not appended, retry with the next event ({1})'.format(day, e))
+                        continue
+                    
+                    # close a past day: no pending images and mastertrack after the end of the day
+                    end_of_day = epoch_time.seconds_to_ns( get_day_date(day).timestamp() ) + epoch_time.DAY_NS
+                    if day != today and len(new_entries) == len(handled) and track_last >= end_of_day:
+                        del days[day]
+                        state_file = get_watch_state_file(suboutdir, args, day)
+                        if os.path.isfile(state_file):
+                            os.remove(state_file)
+                        module_logger.info('Day closed: ' + day)
             
+            # wait for the next file event or the poll interval
+            if inotify and watch_descriptor is not None:
+                inotify.read(timeout=int(args.watch_interval * 1000))
+            else:
+                time.sleep(args.watch_interval)
     
-    return
+    except KeyboardInterrupt:
+        module_logger.info('Watch mode stopped')
+
+
+# get names of the instruments to process, "all" = all camera instruments of the mission
+def get_instrument_names(args, config):
+    if 'all' in args.instruments:
+        names = [ name for x in config["instruments"] for name in x if name.startswith(CAMERA_INSTRUMENT_PREFIX) ]
+    else:
+        names = list(args.instruments)
+    
+    return names
+
+
+# copy of args for a single instrument
+def get_instrument_args(args, name):
+    instrument_args = argparse.Namespace( **vars(args) )
+    instrument_args.instrument = name
+    
+    return instrument_args
+
+
+# process all instruments of a cruise in one run
+# mastertrack and interpolator are shared, the level0 scans of the instruments run concurrently
+def main(args, config):
+    
+    names = get_instrument_names(args, config)
+    if len(names) == 0:
+        module_logger.error('No instrument to process for cruise: ' + args.cruise)
+        exit()
+    
+    if args.watch:
+        if len(names) > 1:
+            module_logger.error('Watch mode is possible for one instrument only')
+            exit()
+        
+        watch_level0( get_instrument_args(args, names[0]), config )
+        return 0
+    
+    df, df_firstdate = read_my_file( config["mission"][args.cruise]["track"], use_cache=args.track_cache )
+    f2_lat, f2_lon = get_interpol_parameters(df, max_gap=args.max_gap)
     
+    failed = 0
     
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        futures = [ (name, executor.submit(find_files_to_dfpics, df, get_instrument_args(args, name), config)) for name in names ]
+        
+        for name, future in futures:
+            instrument_args = get_instrument_args(args, name)
+            module_logger.info('Process instrument: ' + name)
+            
+            # a failing instrument does not stop the others
+            try:
+                dfpics, config_singular = future.result()
+
+                dfpics = remove_dfpics_outside(df, dfpics)
+                dfpics = interpolation_dfpics(dfpics, f2_lat, f2_lon)
+
+                if len(dfpics)>100:
+                    plot_me(instrument_args, df, dfpics, config_singular)
+                    write_file(instrument_args, dfpics, config_singular)
+                    write_piczipfile(instrument_args, dfpics, config_singular)
+                else:
+                    module_logger.error('Impossible to show track, to less records')
+            
+            except SystemExit:
+                if len(names) == 1:
+                    raise
+                failed = failed + 1
+                module_logger.error('Instrument not processed: ' + name)
+            
+            except Exception:
+                failed = failed + 1
+                module_logger.exception('Instrument not processed: ' + name)
     
+    return failed
+
 
 
 #####################################################################################                                                    
@@ -558,18 +1118,8 @@ def adjust(argv):
     """Insert de initial and final dates as strings as 20190107(year:2019/month:01/day:07)"""
     
     """for calling the function from the terminal"""
-    parser = argparse.ArgumentParser(description='Process oceanet tsi.') 
-    parser.add_argument('-c', required=True, type=str, dest='cruise', # la variable se guarda en args.id como string
-                    help='Insert the name of the cruise (e.g: PS95 or PS122_1)')
-    parser.add_argument('-i', required=True, type=str, dest='instrument',
-                    help='Name of the instrument')
-    # parser.add_argument('-p', type=str, dest='root_path', default='/vols/oceanet-archive_chief/OCEANET_DATEN_BACKUP/',
-                    # help='Insert the froot path of the oceanet data (e.g: /vols/oceanet-archive_chief/OCEANET_DATEN_BACKUP/')
-    parser.add_argument('--loglevel', default='INFO', dest='loglevel',
-                    help="define loglevel of screen INFO (default) | WARNING | ERROR ")
-    parser.add_argument('--splitted_output', choices=['DAILY', 'FULL'], default='DAILY', dest='splitted_output',
-                    help="define dplitted output FULL | DAILY (default)")
-    args = parser.parse_args()
+    parser = get_parser()
+    args = parser.parse_args(argv)
     
     
     #config = get_toml_config.run()
@@ -605,7 +1155,7 @@ def adjust(argv):
         module_logger.error('Cruise name is not provided!')
         exit()
     
-    if args.instrument is None:
+    if args.instruments is None:
         module_logger.error('Instrument is not provided!')
         exit()
         
@@ -618,6 +1168,45 @@ def adjust(argv):
     return args, config
 
 
+# parser of the command line arguments, also used by the batch runner
+def get_parser():
+    parser = argparse.ArgumentParser(description='Process oceanet tsi.') 
+    parser.add_argument('-c', required=True, type=str, dest='cruise', # la variable se guarda en args.id como string
+                    help='Insert the name of the cruise (e.g: PS95 or PS122_1)')
+    parser.add_argument('-i', required=True, type=str, nargs='+', dest='instruments',
+                    help='Name of the instrument(s), "all" for all camera instruments (' + CAMERA_INSTRUMENT_PREFIX + '*) of the cruise')
+    # parser.add_argument('-p', type=str, dest='root_path', default='/vols/oceanet-archive_chief/OCEANET_DATEN_BACKUP/',
+                    # help='Insert the froot path of the oceanet data (e.g: /vols/oceanet-archive_chief/OCEANET_DATEN_BACKUP/')
+    parser.add_argument('--loglevel', default='INFO', dest='loglevel',
+                    help="define loglevel of screen INFO (default) | WARNING | ERROR ")
+    parser.add_argument('--splitted_output', choices=['DAILY', 'FULL'], default='DAILY', dest='splitted_output',
+                    help="define dplitted output FULL | DAILY (default)")
+    parser.add_argument('--watch', action='store_true', dest='watch',
+                    help="near real time mode, watch the level0 directory of the current day and append new images to the daily txt file")
+    parser.add_argument('--watch_interval', default=10, type=float, dest='watch_interval',
+                    help="define poll interval [s] of the watch mode (default 10)")
+    parser.add_argument('--scan_workers', default=8, type=int, dest='scan_workers',
+                    help="define number of threads to scan the daily level0 directories (default 8)")
+    parser.add_argument('--writer_workers', default=4, type=int, dest='writer_workers',
+                    help="define number of threads to write the daily txt files (default 4)")
+    parser.add_argument('--max_gap', default=None, type=float, dest='max_gap',
+                    help="define maximum gap [s] of the mastertrack, images within larger gaps get no position (default no limit)")
+    parser.add_argument('--zip_workers', default=4, type=int, dest='zip_workers',
+                    help="define number of processes to build the zip archives (default 4)")
+    parser.add_argument('--export', choices=['zip', 'hardlink', 'symlink'], default='zip', dest='export',
+                    help="define export of images zip (default) | hardlink | symlink (directory of links named by VirtualFile + manifest)")
+    parser.add_argument('--checksum', action='store_true', dest='checksum',
+                    help="write sha256 checksums of the images to the manifest of hardlink/symlink directories (reads all images)")
+    parser.add_argument('--plot_decimate', action='store_true', dest='plot_decimate',
+                    help="reduce mastertrack and image positions to the pixel resolution of the track plot")
+    parser.add_argument('--no_track_cache', action='store_false', dest='track_cache',
+                    help="do not use/write the binary cache file of the parsed mastertrack")
+    parser.add_argument('--catalog', action='store_true', dest='catalog',
+                    help="use the persistent level0 file catalog in path_level1a_csv, rescan only changed directories")
+    
+    return parser
+
+
 
 
 #####################################################################################                                                    
@@ -627,27 +1216,4 @@ if __name__ == "__main__":
     
     args, config = adjust(sys.argv[1:])
     
-
-    
-
-    # set timezones
-    timezoneCET = pytz.timezone("CET")
-    timezoneUTC = pytz.timezone("UTC")
-
-    df, df_firstdate = read_my_file( config["mission"][args.cruise]["track"] )
-    f2_lat, f2_lon = get_interpol_parameters(df)
-    dfpics, config_singular = find_files_to_dfpics(df, args, config)
-
-    dfpics = remove_dfpics_outside(df, dfpics)
-    dfpics = interpolation_dfpics(dfpics, f2_lat, f2_lon)
-
-
-
-
-    if len(dfpics)>100:
-        plot_me(df, dfpics, config_singular)
-        write_file(args, dfpics, config_singular)
-        write_piczipfile(args, dfpics, config_singular)
-    else:
-        module_logger.error('Impossible to show track, to less records')
-    
+    sys.exit(main(args, config))
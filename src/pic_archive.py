@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script builds the (daily) image packages of the TSI images for pangaea
+
+Parameters
+----------
+List of package jobs : list of (output_file, list of image pathfiles, list of names in the package)
+Export mode : str (zip | hardlink | symlink)
+Number of processes : int
+
+Processing
+----------
+* the packages are built in a process pool with bounded concurrency
+* zip: each archive is written to a temp file and renamed (atomic_file, no broken archives, mode under the umask)
+* hardlink/symlink: a directory (output_file without .zip) of links named by the VirtualFile,
+  no image is copied, plus a manifest with size/mtime of the images (MANIFEST.txt, no image is read)
+  or optionally with checksums (MANIFEST.sha256, sha256sum format, all images are read)
+* a digest of the file list (name in package, pathfile, size, mtime) is stored as zip comment
+  or in the manifest, an existing package with the same digest is skipped
+
+Returns
+-------
+number of packages which could not be built
+"""
+
+import os
+import hashlib
+import logging
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import atomic_file
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.archive')
+
+
+# name of the manifest in a directory of links, size/mtime or sha256 checksums
+MANIFEST_FILENAME = 'MANIFEST.txt'
+MANIFEST_CHECKSUM_FILENAME = 'MANIFEST.sha256'
+
+
+# digest of the file list of an archive
+def get_filelist_digest(fullpaths, arcnames):
+    digest = hashlib.sha256()
+
+    for fullpath, arcname in zip(fullpaths, arcnames):
+        st = os.stat(fullpath)
+        digest.update( '{0}\t{1}\t{2}\t{3}\n'.format(arcname, fullpath, st.st_size, st.st_mtime_ns).encode() )
+
+    return digest.hexdigest()
+
+
+# check if an existing archive was built from the same file list
+def archive_is_current(output_file, digest):
+    if not os.path.isfile(output_file):
+        return False
+
+    try:
+        with zipfile.ZipFile(output_file) as zf:
+            return zf.comment == digest.encode()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+# build one zip archive (executed in a worker process)
+def build_zip_archive(output_file, fullpaths, arcnames):
+    digest = get_filelist_digest(fullpaths, arcnames)
+
+    if archive_is_current(output_file, digest):
+        return output_file, 'skipped (archive is up to date)'
+
+    with atomic_file.atomic_file(output_file, suffix='.zip') as tmp_file:
+        with zipfile.ZipFile(tmp_file, "w") as zf:
+            for fullpath, arcname in zip(fullpaths, arcnames):
+                zf.write(fullpath, arcname = arcname)
+            zf.comment = digest.encode()
+
+    return output_file, 'written ({0} images)'.format(len(fullpaths))
+
+
+# sha256 of a file
+def get_file_checksum(pathfile):
+    checksum = hashlib.sha256()
+
+    with open(pathfile, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(block)
+
+    return checksum.hexdigest()
+
+
+# manifest of a directory of links: sha256sum format (checksum) or size/mtime of the images
+def get_manifest_filename(checksum):
+    return MANIFEST_CHECKSUM_FILENAME if checksum else MANIFEST_FILENAME
+
+
+# check if an existing directory of links was built from the same file list (first line of manifest)
+def link_tree_is_current(output_dir, digest, checksum=False):
+    try:
+        with open( os.path.join(output_dir, get_manifest_filename(checksum)) ) as f:
+            return f.readline().strip() == '# digest ' + digest
+    except OSError:
+        return False
+
+
+# build one directory of hardlinks/symlinks plus manifest (executed in a worker process)
+# the manifest lists size and mtime of the images, the sha256 of the images (reads all bytes) only if checksum
+def build_link_tree(output_dir, fullpaths, arcnames, mode='hardlink', checksum=False):
+    digest = get_filelist_digest(fullpaths, arcnames)
+
+    if link_tree_is_current(output_dir, digest, checksum):
+        return output_dir, 'skipped (directory is up to date)'
+
+    with atomic_file.atomic_dir(output_dir) as tmp_dir:
+        with open( os.path.join(tmp_dir, get_manifest_filename(checksum)), 'w' ) as manifest:
+            manifest.write('# digest ' + digest + '\n')
+
+            for fullpath, arcname in zip(fullpaths, arcnames):
+                if mode == 'hardlink':
+                    os.link( fullpath, os.path.join(tmp_dir, arcname) )
+                else:
+                    os.symlink( os.path.abspath(fullpath), os.path.join(tmp_dir, arcname) )
+
+                if checksum:
+                    manifest.write( get_file_checksum(fullpath) + '  ' + arcname + '\n' )
+                else:
+                    st = os.stat(fullpath)
+                    manifest.write( '{0}\t{1}\t{2}\n'.format(st.st_size, st.st_mtime_ns, arcname) )
+
+    return output_dir, 'written ({0} {1}s)'.format(len(fullpaths), mode)
+
+
+# pathfile of a package: the zip archive or the directory of links (output_file without .zip)
+def get_package_path(output_file, export='zip'):
+    return output_file if export == 'zip' else os.path.splitext(output_file)[0]
+
+
+# build all packages in a process pool
+# export zip: output_file is the zip archive, hardlink/symlink: output_file without .zip is the directory
+def build_pic_packages(jobs, export='zip', max_workers=4, checksum=False):
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {}
+
+        for output_file, fullpaths, arcnames in jobs:
+            if export == 'zip':
+                future = executor.submit(build_zip_archive, output_file, list(fullpaths), list(arcnames))
+            else:
+                output_file = get_package_path(output_file, export)
+                future = executor.submit(build_link_tree, output_file, list(fullpaths), list(arcnames), export, checksum)
+
+            futures[future] = output_file
+
+        for future in as_completed(futures):
+            try:
+                output_file, status = future.result()
+                module_logger.info('Image package ' + status + ': ' + output_file)
+            except Exception as e:
+                failed = failed + 1
+                module_logger.error('Image package not written: ' + futures[future] + ' (' + str(e) + ')')
+
+    return failed
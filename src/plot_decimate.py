@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script reduces the track points and image positions of a marker plot to the resolution of the plot
+
+Parameters
+----------
+Longitude, Latitude : arrays [degree]
+Tolerance : float [degree], e.g. size of a pixel of the plot
+
+Processing
+----------
+* positions drawn as markers (mastertrack and image positions of location2TSI): one position per pixel (binning)
+* the first position of each pixel is kept, the order of the positions is preserved
+
+Returns
+-------
+indices of the remaining points
+"""
+
+import logging
+
+import numpy as np
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.decimate')
+
+
+# tolerance [degree] of a plot: a pixel of a global map (180 degree) of given width [pixel], half pixel to be safe
+def get_pixel_tolerance(width_inch, dpi):
+    return 180.0 / (width_inch * dpi) * 0.5
+
+
+# pixel (grid cell) keys of positions as int64
+def get_pixel_keys(x, y, tolerance):
+    ix = np.floor( (np.asarray(x, dtype=np.float64) + 360.0) / tolerance ).astype(np.int64)
+    iy = np.floor( (np.asarray(y, dtype=np.float64) + 90.0) / tolerance ).astype(np.int64)
+
+    return ix * 10000000 + iy
+
+
+# decimate positions, one position per pixel
+def decimate_positions(x, y, tolerance):
+    keys = get_pixel_keys(x, y, tolerance)
+    unique_keys, index = np.unique(keys, return_index=True)
+    index = np.sort(index)
+
+    module_logger.info('Decimate positions: {0} -> {1} points'.format(len(keys), len(index)))
+
+    return index
@@ -16,7 +16,7 @@ Instrument :str
 Processing
 ----------
 #Find SCAW1 files
-#Import file to dataframe
+#Import file to dataframe (or load the parsed day from the cache, see option --cache_dir)
 #Append to total_dataframe
 #Export total_dataframe
 
@@ -26,24 +26,39 @@ a netcdf file to publishing via pangaea,de that
 """
 
 
-import glob
 import os
 import sys
 import platform
-import pandas as pd
-import xarray as xr
-import io
+import sqlite3
+import queue
+import functools
 import logging
+import logging.handlers
 import argparse
-import logging
-from datetime import datetime, timezone
-import pytz
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import xarray as xr
 # pip install git+https://github.com/hdeneke/trosat-base
 from trosat import cfconv as cf
-from trosat import sunpos as sp
 import netCDF4
 import numpy as np
+# optional, pip install pyarrow (faster csv parser, otherwise pandas)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
 import get_toml_config
+import level0_walker
+import level0_catalog
+import file_cache
+import rolling_stats
+import sun_geometry
+import scaws_nc
+import epoch_time
+import scaws_overview
+import scaws_quicklook
 
 
 """ Create logger, name important """
@@ -57,11 +72,26 @@ mapping_table={
         20:'DLR',
     }
 
+# types of the columns of mapping_table (except DateTime)
+column_types={
+        5:np.float64,
+        6:np.float64,
+        19:np.float32,
+        20:np.float32,
+    }
+
+# suffix of the cache files of the parsed daily files
+SCAW1_CACHE_SUFFIX = '.scaws.npz'
+
+# default directory of the cache files in path_level1a_csv of the instrument
+SCAW1_CACHE_DIRNAME = 'scaws_cache'
+
 # find files and sort
 # ! Note: function sorted and glob does'nt return a sorted list, a workaround is required to sort the list of strings
 # files = glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True)
 # files = sorted( glob.glob('/home/hengst/scripte/python' + '/**/*.py', recursive=True), key=os.path.getsize)
-def find_scaw1_files(config):
+# first_date: only daily files of this date and later (update mode)
+def find_scaw1_files(args, config, first_date=None):
     module_logger.info('Find files in directory tree')
     
     instrument = None
@@ -79,6 +109,13 @@ def find_scaw1_files(config):
     # get metadata of mission
     mission = config["mission"][args.cruise]
     
+    # update mode: daily files of the dates from first_date
+    if first_date:
+        instrument = dict(instrument)
+        instrument["_path_filenames_level0"] = [ get_toml_config.get_level0_pattern(instrument, date)
+                                                 for date in mission["_"]["dates"] if date >= first_date ]
+        module_logger.info('Update: {0} daily files from {1:%Y-%m-%d}'.format( len(instrument["_path_filenames_level0"]), first_date ) )
+    
     # check if dir exists
     if not (os.path.isdir(instrument["path_level0_fix"])):
         module_logger.warning('Data directory not exists: ' + instrument["path_level0_fix"])
@@ -87,71 +124,131 @@ def find_scaw1_files(config):
         module_logger.info('Find files in directory: ' + instrument["path_level0_fix"])
         
         
-    total_df = pd.DataFrame()
+    # daily blocks are collected and combined once at the end (linear in the number of days)
+    blocks = []
 
         
 
-    # iteration
-    index=-1
-    for path_filename_level0 in instrument["_path_filenames_level0"]:
-        index=index+1
+    try:
+        if args.catalog:
+            pathfiles = catalog_scaw1_files(args, instrument)
+        else:
+            pathfiles = scan_scaw1_files(args, instrument)
         
-        # name of current diretcory
-        dirname = os.path.dirname(path_filename_level0)
+        cache_dir = get_cache_dir(args, instrument)
         
-        # check if directory exists
-        if not (os.path.isdir( dirname )):
-            module_logger.warning('Data sub-directory not exists: ' + dirname)
-            continue
-        
-        # check is direcoty is readable       
-        if not (os.access(dirname, os.R_OK)):
-            module_logger.warning("No read access to path: " + dirname)
-            quit()
+        if args.parse_workers > 1:
+            blocks = read_scaw1_files_parallel(pathfiles, args.parse_workers, cache_dir)
+        else:
+            for pathfile in pathfiles:
+                # read file
+                df = read_single_scaw1_file(pathfile, cache_dir)
+                if df is not None:
+                    blocks.append(df)
+    
+    # check is direcoty is readable
+    except PermissionError as e:
+        module_logger.warning("No read access to path: " + str(e.filename))
+        quit()
     
+    if len(blocks) == 0:
+        module_logger.warning('In total no data were found!')
+        quit()
     
-        # read file
-        total_df = read_single_scaw1_file(path_filename_level0, total_df)
+    module_logger.info('Combine {0} daily blocks to total DataFrame.'.format(len(blocks)))
+    total_df = pd.concat(blocks, ignore_index=True)
         
     return total_df
+
+
+# generator of the daily files, the directories are scanned concurrently and returned in date order
+def scan_scaw1_files(args, instrument):
+    walker = level0_walker.walk_level0( instrument["_path_filenames_level0"], max_workers=args.scan_workers )
+    
+    for path_filename_level0, entries in walker:
+        
+        # check if directory exists
+        if entries is None:
+            module_logger.warning('Data sub-directory not exists: ' + os.path.dirname(path_filename_level0))
+            continue
+        
+        if len(entries) == 0:
+            module_logger.warning("File not exists: " + path_filename_level0)
+            continue
         
+        yield entries[0].path
+
 
-def read_single_scaw1_file(pathfile, total_df):
+# list of the daily files from the persistent level0 catalog, only changed directories are rescanned
+def catalog_scaw1_files(args, instrument):
+    catalog_file = level0_catalog.get_catalog_file(instrument)
+    
+    try:
+        connection = level0_catalog.open_catalog(catalog_file)
+    except sqlite3.Error as e:
+        module_logger.error('Level0 catalog not usable: ' + catalog_file + ' (' + str(e) + ')')
+        quit()
+    
+    level0_catalog.update_catalog(connection, args.cruise, args.instrument, instrument["_path_filenames_level0"], max_workers=args.scan_workers)
+    
+    # files of the requested daily patterns only (update mode)
+    rows = level0_catalog.get_files(connection, args.cruise, args.instrument, instrument["_path_filenames_level0"])
+    connection.close()
+    
+    return [ row[1] for row in rows ]
+
+
+
+# directory of the cache files of the parsed daily files, None if the cache is disabled
+# default is next to the level0 catalog in path_level1a_csv of the instrument (independent of the working directory)
+def get_cache_dir(args, instrument):
+    if not args.cache:
+        return None
+    
+    if args.cache_dir:
+        return args.cache_dir
+    
+    return os.path.join( instrument["path_level1a_csv"], SCAW1_CACHE_DIRNAME )
+
+
+# read a daily file, the parsed and cleaned columns are loaded from/written to the cache directory (if cache_dir)
+# the cache file is keyed by name, size and mtime of the daily file, only changed days are parsed again
+# cached and parsed days pass the same checks (NaN, duplicates)
+def read_single_scaw1_file(pathfile, cache_dir=None):
     
     if not (os.path.exists(pathfile) ):
         module_logger.warning("File not exists: " + pathfile)
-        return total_df
-    else:
-        module_logger.info('Read scaw1 file: ' + pathfile)
-
+        return None
+    
+    df = None
     
+    if cache_dir:
+        cache_file = file_cache.get_cache_file(pathfile, SCAW1_CACHE_SUFFIX, cache_dir)
+        
+        df = read_scaw1_cache_file(cache_file)
+        if df is not None:
+            module_logger.info('Read scaw1 file from cache file: ' + cache_file)
     
+    if df is None:
+        module_logger.info('Read scaw1 file: ' + pathfile)
+        
+        df = clean_scaw1_file(pathfile)
+        
+        if cache_dir:
+            file_cache.write_cache_file(cache_file, pathfile, SCAW1_CACHE_SUFFIX, scaw1_df_to_arrays(df))
     
-    # simple csv read via pandas not possible, cause files contains "
-    # wor around 
-    #   * read file
-    #   * remove "
-    #   * put content ti io buffer
-    #   * read via read_csv from buffer
+    check_scaw1_day(df)
     
-    content = open(pathfile).read()
-    content = content.replace("\"", "")
-   
+    return df
+
 
+# parse a daily file, drop rows with NaN values, DateTime as int64 nanoseconds, sorted by DateTime
+def clean_scaw1_file(pathfile):
     
-    # put string content to io buffer to read via panda
-    # https://stackoverflow.com/questions/56842369/how-do-you-use-pandas-read-csv-method-if-the-csv-is-stored-as-a-variable
-    buffer = io.StringIO(content)
-    #df = pd.read_csv(buffer, sep=',', skiprows = 0, header = None, parse_dates = [0], na_values='NAN')
-    df = pd.read_csv(buffer, sep=',', skiprows = 0, header = None, parse_dates = [0], na_values='NAN', usecols=list(mapping_table.keys()) )
+    # the quoted format is parsed directly (quote aware parser), only columns of mapping_table are read
+    df = parse_scaw1_file(pathfile)
     module_logger.debug( "\n"+ str( df.head(2) ) )
-   
-    # reanme relevant columns
-    df.rename( columns = mapping_table, inplace = True )
     
-    # set UTC timezone
-    module_logger.debug('Set timezone UTC')
-    df['DateTime [UTC]'] = df['DateTime [UTC]'].dt.tz_localize(pytz.timezone('UTC'))
    
    # print(df)
     
@@ -161,14 +258,31 @@ def read_single_scaw1_file(pathfile, total_df):
     
     lat_nan = df['Latitude'].isna().sum()
     lon_nan = df['Longitude'].isna().sum()
-    if dsr_nan > 0 or dlr_nan > 0 or lat_nan > 0 or lon_nan > 0:
+    
+    # unparseable times (NaT) would become int64 min in to_ns
+    time_nan = df['DateTime [UTC]'].isna().sum()
+    if dsr_nan > 0 or dlr_nan > 0 or lat_nan > 0 or lon_nan > 0 or time_nan > 0:
         module_logger.info('NaN values found in Lat {0}, in Lon {0}'.format(lat_nan, lon_nan))
         module_logger.info('NaN values found in DSR {0}, in DLR {0}'.format(dsr_nan, dlr_nan))
+        module_logger.info('NaT values found in DateTime {0}'.format(time_nan))
         module_logger.info('Rows with NaN values are dropped')
         df.dropna(inplace=True)
         
    # print(df)
     
+    # DateTime (UTC) as int64 nanoseconds, after dropping the NaN rows (NaT)
+    df['DateTime [UTC]'] = epoch_time.to_ns(df['DateTime [UTC]'])
+    
+    # sort data, stable: records of the same time keep the order of the file (--duplicates first/last)
+    df.sort_values(by='DateTime [UTC]', inplace=True, kind='stable')
+    
+    # selected columns of the current file, combined to total dataframe in find_scaw1_files
+    return df[ list( mapping_table.values()) ]
+
+
+# check a daily DataFrame (parsed or from the cache): no NaN values, warn about duplicated DateTime
+def check_scaw1_day(df):
+    
      # check nan
     number_nan_values = df[ list( mapping_table.values()) ].isnull().sum().sum()
     if number_nan_values>0:
@@ -179,9 +293,6 @@ def read_single_scaw1_file(pathfile, total_df):
         module_logger.error(df[row_has_NaN] )
         quit()
     
-    # sort data
-    df.sort_values(by='DateTime [UTC]', inplace=True)
-    
     #print(df)
     # check if datetime is unique
     #if len(df['DateTime [UTC]'].unique())>0:
@@ -191,54 +302,215 @@ def read_single_scaw1_file(pathfile, total_df):
     # check if datetime is unique
     if df.duplicated(subset=['DateTime [UTC]']).sum() > 0:
         module_logger.warning('{0} / {1} duplicates in rows of DateTime exists!'.format( str( df.duplicated(subset=['DateTime [UTC]']).sum() ), str(len(df)) ) )
-        module_logger.warning( 'Duplicates are: \n{0}'.format( df['DateTime [UTC]'][ df['DateTime [UTC]'].duplicated() ] ) )
-        
+        module_logger.warning( 'Duplicates are: \n{0}'.format( '\n'.join( epoch_time.to_string( df['DateTime [UTC]'][ df['DateTime [UTC]'].duplicated() ] ) ) ) )
+
+
+# load the parsed columns of a daily file from the cache file, None if there is no (readable) cache file
+def read_scaw1_cache_file(cache_file):
+    if not os.path.isfile(cache_file):
+        return None
     
-    # append selected columns to total dataframe
-    #total_df.append( df[["DT", "DSR",'DLR']], ignore_index=True )
-    module_logger.debug('Add data of current file to total DataFrame.')
+    try:
+        with np.load(cache_file) as data:
+            arrays = { column : data[column] for column in mapping_table.values() }
+    except (OSError, ValueError, KeyError) as e:
+        module_logger.warning('Cache file not readable, parse daily file: ' + cache_file + ' (' + str(e) + ')')
+        return None
     
-    total_df = pd.concat([total_df,df[ list( mapping_table.values()) ] ])
+    return scaw1_arrays_to_df(arrays)
+
+
+# columns of a daily DataFrame as compact numpy arrays, DateTime as int64 nanoseconds (UTC)
+def scaw1_df_to_arrays(df):
+    return { column : df[column].values for column in df.columns }
+
+
+# daily DataFrame of numpy arrays (see scaw1_df_to_arrays)
+def scaw1_arrays_to_df(arrays):
+    return pd.DataFrame(arrays)
     
     
-    return total_df
+# read daily files in a process pool, blocks are returned in date order
+def read_scaw1_files_parallel(pathfiles, workers, cache_dir=None):
+    module_logger.info('Read scaw1 files with {0} processes'.format(workers))
     
+    blocks = []
     
-################
-def handle_duplicates(args, total_df):
-        # sort
-    total_df.sort_values(by='DateTime [UTC]', inplace=True)
-
-    if total_df.duplicated(subset=['DateTime [UTC]']).sum() > 0:
-        module_logger.error('{0} / {1} duplicates / total number of records in row DateTime exists!'.format( str( total_df.duplicated(subset=['DateTime [UTC]']).sum()), str(len(total_df))  ) )
-        module_logger.error( 'Duplicates are: \n{0}'.format( total_df['DateTime [UTC]'][ total_df['DateTime [UTC]'].duplicated() ] ) )
-        
-        # excption
-        ans = input("Save data although duplicates exists, otherwise duplicated will be dropped? [y/N] ")
-        if ans == "y":
-            nc_file = nc_file + '_include_duplicates.nc'
-            module_logger.info( "Your choise: save data include duplicates!" )
-        elif ans == "N":
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_parse_worker) as executor:
+        for arrays, records, exit_code in executor.map( functools.partial(read_scaw1_block, cache_dir=cache_dir), pathfiles ):
             
-            total_df.drop_duplicates(subset=['DateTime [UTC]'], keep='first', inplace=True)
-            module_logger.info( "Drop duplicates, kept first occurence!" )
+            # log the diagnostics of the worker
+            for record in records:
+                logging.getLogger(record.name).handle(record)
             
-            if total_df.duplicated(subset=['DateTime [UTC]']).sum() > 0:
-                module_logger.error( "Duplicates still exists" )
-                exit()
+            if exit_code is not False:
+                sys.exit(exit_code)
             
-            # check unsorted
-            if not (total_df['DateTime [UTC]'].is_monotonic_increasing):
-                module_logger.error( "Dataset is not sorted: no monotonic" )
-                exit()
-                
-    return total_df
+            if arrays is not None:
+                blocks.append( scaw1_arrays_to_df(arrays) )
+    
+    return blocks
+
+
+# setup of a parse worker process: log records are collected and logged by the parent process
+def init_parse_worker():
+    global worker_log_records
+    worker_log_records = queue.SimpleQueue()
+    
+    logger = logging.getLogger('oceanet')
+    logger.handlers = [ logging.handlers.QueueHandler(worker_log_records) ]
+    logger.setLevel(logging.DEBUG)
+
+
+# read one daily file in a worker process
+# returns compact numpy arrays (DateTime as int64 nanoseconds), the log records and the exit code (False = no exit)
+def read_scaw1_block(pathfile, cache_dir=None):
+    exit_code = False
+    arrays = None
+    
+    try:
+        df = read_single_scaw1_file(pathfile, cache_dir)
+        
+        if df is not None:
+            arrays = scaw1_df_to_arrays(df)
+    except SystemExit as e:
+        exit_code = e.code
+    
+    records = []
+    while not worker_log_records.empty():
+        records.append( worker_log_records.get() )
+    
+    return arrays, records, exit_code
+
+
+# parse a daily file with quoted values, columns of mapping_table only, typed columns
+# radiation as float32, Latitude/Longitude as float64 (precision of the position for the sun angles)
+def parse_scaw1_file(pathfile):
+    
+    if pacsv:
+        try:
+            return parse_scaw1_file_pyarrow(pathfile)
+        except pa.ArrowInvalid as e:
+            module_logger.warning('pyarrow could not parse file, use pandas: ' + pathfile + ' (' + str(e) + ')')
+    
+    df = pd.read_csv(pathfile, sep=',', quotechar='"', skiprows = 0, header = None, parse_dates = [0], na_values='NAN',
+                     usecols=list(mapping_table.keys()), dtype=column_types )
+    
+    # reanme relevant columns
+    df.rename( columns = mapping_table, inplace = True )
+    
+    return df
+
+
+# parse a daily file via pyarrow.csv (multithreaded, quote aware, column projection)
+def parse_scaw1_file_pyarrow(pathfile):
+    
+    read_options = pacsv.ReadOptions(autogenerate_column_names=True)
+    parse_options = pacsv.ParseOptions(delimiter=',', quote_char='"')
+    convert_options = pacsv.ConvertOptions(
+        include_columns=[ 'f{0}'.format(index) for index in mapping_table ],
+        column_types=dict( [ ('f0', pa.timestamp('ns')) ] + [ ('f{0}'.format(index), pa.from_numpy_dtype(dtype)) for index, dtype in column_types.items() ] ),
+        null_values=['NAN'],
+    )
+    
+    table = pacsv.read_csv(pathfile, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    df = table.to_pandas()
+    
+    # reanme relevant columns
+    df.columns = [ mapping_table[ int(name[1:]) ] for name in df.columns ]
+    
+    return df
+
+
+################
+# duplicates of DateTime are resolved by the policy of option --duplicates (first | last | mean | flag), no interaction
+# one pass over the sorted int64 time array, a report of the duplicates is written to out/<mission>_<instrument>_duplicates.txt
+# the report is extended by the duplicates of the new records if append (update mode)
+def handle_duplicates(args, total_df, append=False):
+    
+    # stable sort: records of the same time keep the order of the daily files
+    times = epoch_time.to_ns( total_df['DateTime [UTC]'] )
+    if len(times) > 1 and np.any( np.diff(times) < 0 ):
+        order = np.argsort(times, kind='stable')
+        total_df = total_df.iloc[order].reset_index(drop=True)
+        times = times[order]
+    
+    # first record of each time, start index and number of records of each time
+    is_first = np.ones( len(times), dtype=bool )
+    is_first[1:] = times[1:] != times[:-1]
+    starts = np.flatnonzero(is_first)
+    counts = np.diff( np.append(starts, len(times)) )
+    
+    total_df['ok_flag_duplicate'] = 1
+    
+    number_duplicates = len(times) - len(starts)
+    if number_duplicates == 0:
+        module_logger.info('No duplicates in row DateTime.')
+        return total_df
+    
+    module_logger.warning('{0} / {1} duplicates / total number of records in row DateTime exists!'.format( str(number_duplicates), str(len(times)) ) )
+    
+    write_duplicate_report(args, total_df, starts, counts, append=append)
+    
+    if args.duplicates == 'first':
+        total_df = total_df.iloc[starts]
+        module_logger.info( "Drop duplicates, kept first occurence!" )
+    
+    elif args.duplicates == 'last':
+        total_df = total_df.iloc[starts + counts - 1]
+        module_logger.info( "Drop duplicates, kept last occurence!" )
+    
+    elif args.duplicates == 'mean':
+        total_df = average_duplicates(total_df, starts, counts)
+        module_logger.info( "Duplicates are averaged!" )
+    
+    elif args.duplicates == 'flag':
+        total_df.loc[ np.repeat(counts > 1, counts), 'ok_flag_duplicate' ] = 0
+        module_logger.info( "Save data include duplicates, flagged via ok_flag_duplicate!" )
+    
+    return total_df.reset_index(drop=True)
+
+
+# average of the records of each time (starts/counts of the sorted times)
+def average_duplicates(total_df, starts, counts):
+    mean_df = total_df.iloc[starts].copy()
+    
+    for column in [ 'Latitude', 'Longitude', 'DSR', 'DLR' ]:
+        values = total_df[column].values.astype(np.float64)
+        mean_df[column] = ( np.add.reduceat(values, starts) / counts ).astype( total_df[column].dtype )
+    
+    return mean_df
+
+
+# compact report of the duplicates: time, number of records, range of DSR and DLR
+# if append the rows are added to an existing report (records of an update are later than the reported ones)
+def write_duplicate_report(args, total_df, starts, counts, append=False):
+    report_file = "out/" + args.cruise + "_" + args.instrument + '_duplicates.txt'
+    
+    report = pd.DataFrame( { 'DateTime [UTC]' : epoch_time.to_string( total_df['DateTime [UTC]'].values[starts] ), 'Count' : counts } )
+    for column in [ 'DSR', 'DLR' ]:
+        values = total_df[column].values
+        report[column + '_min'] = np.minimum.reduceat(values, starts)
+        report[column + '_max'] = np.maximum.reduceat(values, starts)
+    
+    report = report[ counts > 1 ]
+    
+    module_logger.info('Write report of {0} duplicated times: {1}'.format( len(report), report_file ) )
+    os.makedirs( os.path.dirname(report_file), exist_ok=True )
+    
+    if append and os.path.isfile(report_file) and os.path.getsize(report_file) > 0:
+        report.to_csv(report_file, sep='\t', index=False, mode='a', header=False)
+    else:
+        report.to_csv(report_file, sep='\t', index=False)
     
     
 ################
 def flag_sun_angle(args, total_df):
     """ Calculate cosine of zenith, angle and earth-sun-distance """
-    szen, sazi = sp.sun_angles( total_df["DateTime [UTC]"], total_df["Latitude"] , total_df["Longitude"] )
+    # ephemeris on a coarse time grid, interpolated to the records (exact computation via --exact_sun_angles)
+    times = epoch_time.to_ns( total_df["DateTime [UTC]"] )
+    step = None if args.exact_sun_angles else args.sun_grid_step
+    szen, sazi = sun_geometry.sun_angles( times, total_df["Latitude"].values, total_df["Longitude"].values, step=step )
     total_df['szen'] = szen
     total_df['sazi'] = sazi
    # total_df['nautical twilight'] = total_df['szen'] - 12
@@ -261,8 +533,12 @@ def flag_sun_angle(args, total_df):
     
 ################
 def flag_outlier(args, total_df):
-    z_dsr, avg_dsr, std_dsr, total_df["ok_flag_dsr_outlier"] = zscore(total_df["DSR"], window=86400, thresh=args.limit_value_sigma_standard_deviation_outlier_flagging, return_all=True)
-    z_dlr, avg_dlr, std_dlr, total_df["ok_flag_dlr_outlier"] = zscore(total_df["DLR"], window=86400, thresh=args.limit_value_sigma_standard_deviation_outlier_flagging, return_all=True)
+    # centred time based window (seconds), mean/std of DSR and DLR in one pass
+    times = epoch_time.to_ns( total_df["DateTime [UTC]"] )
+    stats = rolling_stats.rolling_mean_std( times, { "DSR": total_df["DSR"].values, "DLR": total_df["DLR"].values }, int(args.rolling_window * 1e9) )
+    
+    z_dsr, avg_dsr, std_dsr, total_df["ok_flag_dsr_outlier"] = zscore(total_df["DSR"], *stats["DSR"], thresh=args.limit_value_sigma_standard_deviation_outlier_flagging, return_all=True)
+    z_dlr, avg_dlr, std_dlr, total_df["ok_flag_dlr_outlier"] = zscore(total_df["DLR"], *stats["DLR"], thresh=args.limit_value_sigma_standard_deviation_outlier_flagging, return_all=True)
     
     # if outlier flag = 0 = outlier!
     
@@ -280,15 +556,26 @@ def plot_data ( args) :
     # extract some attrs
     sigma           = data_xr.attrs["limit_value_sigma_standard_deviation_outlier_flagging"]
     zenith_angle    = data_xr.attrs["limit_value_zenith_angle_sun_for_flagging"]
+    data_xr.close()
+    
+    # overview level (min/max/mean per bin) with not more bins than pixels of the figure, not the 1 Hz records
+    overview_file = scaws_overview.get_overview_file(nc_file)
+    if not os.path.isfile(overview_file):
+        module_logger.warning("Overview file not exists, build it: " + overview_file)
+        scaws_overview.update_overview_file(nc_file)
     
-    # flagged outlier
-    outlier_dsr = data_xr.where(data_xr['ok_flag_dsr_outlier'] == 0, drop=True)
-    #outlier_dsr = data_xr[data_xr["ok_flag_dsr_outlier"] == 0]
-    #outlier_dlr = data_xr[data_xr["ok_flag_dlr_outlier"] == 0]
-    outlier_dlr = data_xr.where(data_xr['ok_flag_dlr_outlier'] == 0, drop=True)
+    width_pixel = 10 * 100
+    level = scaws_overview.select_level(overview_file, width_pixel)
+    times, ov = scaws_overview.read_overview(overview_file, level)
+    time = epoch_time.to_datetime64(times)
+    module_logger.info("Plot overview level {0} s, {1} bins".format(level, len(times)))
+    
+    # flagged bins (at least one flagged record), marked at the max of the bin
+    outlier_dsr = ov['ok_flag_dsr_outlier_flagged'] > 0
+    outlier_dlr = ov['ok_flag_dlr_outlier_flagged'] > 0
     
     # flagged dsr zenith
-    flagged_zenith_dsr = data_xr.where(data_xr['ok_flag_dsr_sun_zen'] == 0, drop=True)
+    flagged_zenith_dsr = ov['ok_flag_dsr_sun_zen_flagged'] > 0
     
     import matplotlib.pyplot as plt
     
@@ -300,21 +587,23 @@ def plot_data ( args) :
     ax1[0].set_xlabel('Date and Time [UTC]')
     ax1[0].set_ylabel('exp', color=color)
     ax1[0].set_title("Surface downwelling flux and outlier flags at " + args.cruise)
-    lsn1=ax1[0].plot(data_xr['time'], data_xr['DSR'] , label='Shortwave radiation flux', color=color)
+    ax1[0].fill_between(time, ov['DSR_min'], ov['DSR_max'], color=color, alpha=0.3, linewidth=0)
+    lsn1=ax1[0].plot(time, ov['DSR_mean'] , label='Shortwave radiation flux', color=color)
     ax1[0].tick_params(axis='y', labelcolor=color)
     
-    lsn11=ax1[0].plot(outlier_dsr['time'], outlier_dsr['ok_flag_dsr_outlier'] + outlier_dsr['DSR'], marker='o', ls='' , label='Flag outlier $\\sigma>$' + str(sigma) + ", shortwave radiation, flags in total = " +str(len(outlier_dsr['DSR'])), color="peru")
+    lsn11=ax1[0].plot(time[outlier_dsr], ov['DSR_max'][outlier_dsr], marker='o', ls='' , label='Flag outlier $\\sigma>$' + str(sigma) + ", shortwave radiation, flags in total = " +str(ov['ok_flag_dsr_outlier_flagged'].sum()), color="peru")
 
     ax2 = ax1[0].twinx()  # instantiate a second axes that shares the same x-axis
     
     color = 'tab:blue'
     ax2.set_ylabel('sin', color=color)  # we already handled the x-label with ax1
-    lsn2=ax2.plot(data_xr['time'], data_xr['DLR'] , label='Longwave radiation flux ', color=color)
+    ax2.fill_between(time, ov['DLR_min'], ov['DLR_max'], color=color, alpha=0.3, linewidth=0)
+    lsn2=ax2.plot(time, ov['DLR_mean'] , label='Longwave radiation flux ', color=color)
     ax2.tick_params(axis='y', labelcolor=color)
     
     
     
-    lsn21=ax2.plot(outlier_dlr['time'], outlier_dlr['ok_flag_dlr_outlier'] + outlier_dlr['DLR'], marker='o', ls='' , label='Flag outlier $\\sigma>$' + str(sigma) + ", longwave radiation, flags in total = " + str(len(outlier_dlr['ok_flag_dlr_outlier'] )), color="magenta")
+    lsn21=ax2.plot(time[outlier_dlr], ov['DLR_max'][outlier_dlr], marker='o', ls='' , label='Flag outlier $\\sigma>$' + str(sigma) + ", longwave radiation, flags in total = " + str(ov['ok_flag_dlr_outlier_flagged'].sum()), color="magenta")
     
     leg = lsn1 + lsn11+ lsn2 +lsn21
     labs = [l.get_label() for l in leg]
@@ -337,7 +626,7 @@ def plot_data ( args) :
     
     # subplot 2 plot azi zen angle
     color = 'tab:green'
-    lsn3 = ax1[1].plot(data_xr['time'], data_xr['szen'] , label='Zenit angle ', color=color)
+    lsn3 = ax1[1].plot(time, ov['szen_mean'] , label='Zenit angle ', color=color)
     ax1[1].set_ylabel('Zenith angle', color=color)
     ax1[1].tick_params(axis='y', labelcolor=color)
     ax1[1].set_title("Sun angle at " + args.cruise)
@@ -345,7 +634,7 @@ def plot_data ( args) :
     color = 'tab:orange'
     ax4 = ax1[1].twinx()
     ax4.tick_params(axis='y', labelcolor=color)
-    lsn4 = ax4.plot(data_xr['time'], data_xr['sazi'] , label='Azimuth angle ', color=color)
+    lsn4 = ax4.plot(time, ov['sazi_mean'] , label='Azimuth angle ', color=color)
     ax4.set_ylabel('Azimuth angle', color=color)
     
     ax1[1].set_ylim([55,125])
@@ -361,15 +650,17 @@ def plot_data ( args) :
     color = 'tab:red'
     ax1[2].set_ylabel('DSR flux [W*m^{-2}]', color=color)
     ax1[2].set_title("Surface downwelling shortwave flux and sun angle flags at " + args.cruise)
-    lsn5=ax1[2].plot(data_xr['time'], data_xr['DSR'] , label='Shortwave radiation ', color=color)
-    lsn51=ax1[2].plot(flagged_zenith_dsr['time'], flagged_zenith_dsr['ok_flag_dsr_sun_zen'] + flagged_zenith_dsr['DSR'], marker='o', ls='',label='Flag (sun zenit angle > ' + str(zenith_angle) + '), flags in total = ' + str(len(flagged_zenith_dsr['DSR'])), color="green")
+    ax1[2].fill_between(time, ov['DSR_min'], ov['DSR_max'], color=color, alpha=0.3, linewidth=0)
+    lsn5=ax1[2].plot(time, ov['DSR_mean'] , label='Shortwave radiation ', color=color)
+    lsn51=ax1[2].plot(time[flagged_zenith_dsr], ov['DSR_mean'][flagged_zenith_dsr], marker='o', ls='',label='Flag (sun zenit angle > ' + str(zenith_angle) + '), flags in total = ' + str(ov['ok_flag_dsr_sun_zen_flagged'].sum()), color="green")
     leg = lsn5 + lsn51 
     labs = [l.get_label() for l in leg]
     ax1[2].legend(leg, labs, loc=0)
     
     # plot to file
     my_fn = "out/" + args.cruise + "_" + args.instrument + ".png"
-    plt.savefig(my_fn)
+    plt.savefig(my_fn, dpi=100)
+    plt.close(fig)
     module_logger.info("Plot data: " + my_fn)
     
 ################
@@ -394,15 +685,12 @@ def write_data( args, total_df ):
 
     cfjson=cf.read_cfjson(json_file)
     
-    # compute seconds since
-    second_since = netCDF4.date2num(total_df['DateTime [UTC]'], cfjson['variables']['time']['attributes']['units'])
-    
     
     # add metadata
     cfjson["attributes"]["file_created"] = datetime.utcnow().strftime('%Y-%m-%d')
     cfjson["attributes"]["project_mission"] = args.cruise
-    cfjson["attributes"]["time_coverage_start"] = str( total_df['DateTime [UTC]'].min() )
-    cfjson["attributes"]["time_coverage_end"] = str( total_df['DateTime [UTC]'].max() )
+    cfjson["attributes"]["time_coverage_start"] = str( epoch_time.to_timestamp( total_df['DateTime [UTC]'].min() ) )
+    cfjson["attributes"]["time_coverage_end"] = str( epoch_time.to_timestamp( total_df['DateTime [UTC]'].max() ) )
     cfjson["attributes"]["geospatial_lat_min"] = total_df['Latitude'].min()
     cfjson["attributes"]["geospatial_lat_max"] = total_df['Latitude'].max()
     cfjson["attributes"]["geospatial_lon_min"] = total_df['Longitude'].min()
@@ -422,40 +710,25 @@ def write_data( args, total_df ):
             del cfjson["attributes"][mykey]
             
     
-    # set Dim
-    cfjson.setDim('time', len(second_since))
-    
-    # add data to json
-    module_logger.info( "Add tmp data to json variable" )
-    for index , local_column_name in mapping_table.items():
-        if "DateTime" in local_column_name:
-            cfjson.setData('time',second_since)
-        else:
-            cfjson.setData(local_column_name, total_df[ local_column_name ])
-    
-    # add some variables to netcdf
-    cfjson.setData('szen', total_df[ 'szen' ])
-    cfjson.setData('sazi', total_df[ 'sazi' ])
-    cfjson.setData('ok_flag_dsr_sun_zen', total_df[ 'ok_flag_dsr_sun_zen' ])
-    cfjson.setData('ok_flag_dsr_outlier', total_df[ 'ok_flag_dsr_outlier' ])
-    cfjson.setData('ok_flag_dlr_outlier', total_df[ 'ok_flag_dlr_outlier' ])
+    # columns of the variables (mapping_table and computed variables), time as int64 nanoseconds
+    times = epoch_time.to_ns( total_df['DateTime [UTC]'] )
+    data = { name : total_df[name].values for name in cfjson["variables"] if name != 'time' }
     
-    
-    # write nc file
+    # write nc file: unlimited time dimension, compressed, written in daily blocks
     module_logger.info('Write data to file: ' + nc_file )
-    """ Creating and saving the netCDF-File """
-    f = cf.create_file(nc_file, cfdict=cfjson)
+    scaws_nc.write_nc_file(nc_file, cfjson, times, data, chunk_records=args.nc_chunk, complevel=args.nc_complevel)
     
-    f.close()
+    # overview levels for plotting (sidecar file)
+    scaws_overview.write_overview_file( scaws_overview.get_overview_file(nc_file), times, data, cfjson["variables"]["time"]["attributes"]["units"] )
 
 
 
 #################
 # https://stackoverflow.com/questions/75938497/outlier-detection-of-time-series-data
-def zscore(s, window, thresh=3, return_all=False):
-    roll = s.rolling(window=window, min_periods=1, center=True)
-    avg = roll.mean()
-    std = roll.std(ddof=0)
+# z-score of a series with the rolling mean/std (see rolling_stats), m is False for outliers
+def zscore(s, avg, std, thresh=3, return_all=False):
+    avg = pd.Series(avg, index=s.index)
+    std = pd.Series(std, index=s.index)
     z = s.sub(avg).div(std)   
     m = z.between(-thresh, thresh)
     
@@ -463,6 +736,116 @@ def zscore(s, window, thresh=3, return_all=False):
         return z, avg, std, m
     return s.where(m, avg)
 
+# append the days after the last record of an existing netcdf file (update mode)
+# sun angles of the new records only, outlier flags of the new records and of the existing records
+# within half a window before the first new record (centred rolling statistics)
+# returns the time of the first changed record, None if the file is up to date
+def update_data(args, config):
+    nc_file = "out/" + args.cruise + "_" + args.instrument + '.nc'
+    
+    module_logger.info('Update data of file: ' + nc_file)
+    
+    with netCDF4.Dataset(nc_file, 'a') as dataset:
+        
+        # flags of the existing records must be based on the same limits
+        for attribute, value in [ ("limit_value_zenith_angle_sun_for_flagging", args.limit_value_zenith_angle_sun_for_flagging),
+                                  ("limit_value_sigma_standard_deviation_outlier_flagging", args.limit_value_sigma_standard_deviation_outlier_flagging) ]:
+            if attribute in dataset.ncattrs() and dataset.getncattr(attribute) != str(value):
+                module_logger.error('Update not possible, {0} of file is {1} (option {2}), process without --update'.format( attribute, dataset.getncattr(attribute), value ) )
+                quit()
+        
+        nc_times = epoch_time.time_values_to_ns( np.ma.filled( dataset["time"][:], np.nan ), dataset["time"].units )
+        if len(nc_times) == 0:
+            module_logger.error('Update not possible, no records in file ' + nc_file + ', process without --update')
+            quit()
+        
+        # the last day of the file can be incomplete (daily file of the current day), it is read again
+        last_time = nc_times[-1]
+        first_date = epoch_time.to_timestamp( epoch_time.floor_day(last_time) ).to_pydatetime()
+        
+        new_df = find_scaw1_files( args, config, first_date=first_date )
+        new_df = new_df[ epoch_time.to_ns( new_df['DateTime [UTC]'] ) > last_time ].reset_index(drop=True)
+        
+        if len(new_df) == 0:
+            module_logger.info('No new records after {0}, file is up to date.'.format( epoch_time.to_timestamp(last_time) ) )
+            return None
+        
+        new_df = handle_duplicates(args, new_df, append=True)
+        new_df = flag_sun_angle(args, new_df)
+        
+        # rolling statistics of the new records need a full window of existing records,
+        # flags of existing records within half a window are recomputed
+        window = int(args.rolling_window * 1e9)
+        new_times = epoch_time.to_ns( new_df['DateTime [UTC]'] )
+        first_context = np.searchsorted(nc_times, new_times[0] - window, side='left')
+        first_rewrite = np.searchsorted(nc_times, new_times[0] - window // 2, side='left')
+        number_old = len(nc_times)
+        
+        window_df = pd.DataFrame( {
+            'DateTime [UTC]' : np.concatenate( (nc_times[first_context:], new_times) ),
+            'DSR' : np.concatenate( (np.ma.filled( dataset["DSR"][first_context:], np.nan ), new_df['DSR'].values) ),
+            'DLR' : np.concatenate( (np.ma.filled( dataset["DLR"][first_context:], np.nan ), new_df['DLR'].values) ),
+        } )
+        window_df = flag_outlier(args, window_df)
+        
+        for flag in [ "ok_flag_dsr_outlier", "ok_flag_dlr_outlier" ]:
+            flags = window_df[flag].values
+            dataset[flag][first_rewrite:number_old] = flags[ first_rewrite - first_context : number_old - first_context ].astype( dataset[flag].dtype )
+            new_df[flag] = flags[ number_old - first_context : ]
+        
+        module_logger.info('Recomputed outlier flags of {0} existing records, append {1} records'.format( number_old - first_rewrite, len(new_df) ) )
+        
+        # first changed record, the overview levels are updated from there
+        from_time = nc_times[first_rewrite] if first_rewrite < number_old else new_times[0]
+
+        scaws_nc.append_nc_data( dataset, new_times, { name : new_df[name].values for name in dataset.variables if name != 'time' } )
+        
+        # refresh coverage and geospatial attributes
+        dataset.setncattr( "time_coverage_end", str( epoch_time.to_timestamp( new_df['DateTime [UTC]'].max() ) ) )
+        for attribute, column, function in [ ("geospatial_lat_min", 'Latitude', min), ("geospatial_lat_max", 'Latitude', max),
+                                             ("geospatial_lon_min", 'Longitude', min), ("geospatial_lon_max", 'Longitude', max) ]:
+            if attribute in dataset.ncattrs():
+                dataset.setncattr( attribute, function( dataset.getncattr(attribute), new_df[column].agg(function.__name__) ) )
+    
+    scaws_overview.update_overview_file(nc_file, from_time)
+    
+    return from_time
+
+
+# processing of a cruise
+def main(args, config):
+    
+    nc_file = "out/" + args.cruise + "_" + args.instrument + '.nc'
+    
+    # first changed record of an update (None: no record changed), the quicklooks are rendered again from its day
+    update = False
+    from_time = None
+    
+    if(args.disable_feature_processing):
+        
+        if args.update and os.path.isfile(nc_file):
+            update = True
+            from_time = update_data(args, config)
+        else:
+            total_df = find_scaw1_files( args, config )
+          
+            total_df = handle_duplicates(args, total_df)
+    
+            total_df = flag_sun_angle(args, total_df)
+            total_df = flag_outlier(args, total_df)
+    
+            write_data(args, total_df)
+    
+    plot_data(args)
+    
+    # daily quicklooks
+    if args.quicklook:
+        return scaws_quicklook.render_quicklooks( nc_file, os.path.join("out", "quicklooks"), args.cruise, args.instrument,
+                                                  max_workers=args.quicklook_workers, update=update, from_time=from_time )
+    
+    return 0
+
+
 #####################################################################################                                                    
 # getting args, setting logger
 def adjust(argv):
@@ -482,20 +865,8 @@ def adjust(argv):
     """Insert de initial and final dates as strings as 20190107(year:2019/month:01/day:07)"""
     
     """for calling the function from the terminal"""
-    parser = argparse.ArgumentParser(description='Process oceanet scaw1.') 
-    parser.add_argument('-c', required=True, type=str, dest='cruise', # la variable se guarda en args.id como string
-                    help='Insert the name of the cruise (e.g: PS95 or PS122_1)')
-    parser.add_argument('-i', required=True, type=str, dest='instrument',
-                    help='Name of the instrument')
-    parser.add_argument('--loglevel', default='INFO', dest='loglevel',
-                    help="define loglevel of screen INFO (default) | WARNING | ERROR ")
-    parser.add_argument('--zenit_angle', default=90, type=int, dest='limit_value_zenith_angle_sun_for_flagging',
-                    help="define zenith angle of sun when shortwave data will get a flag (default 90 degree) ")
-    parser.add_argument('--sigma', default=6, type=int, dest='limit_value_sigma_standard_deviation_outlier_flagging',
-                    help="define sigma that is used for outlier flagging of a rolling window (deafult 6) ")
-    parser.add_argument("--disable-feature-processing", action="store_false",
-                    help="switch to plot only, no data processing")
-    args = parser.parse_args()
+    parser = get_parser()
+    args = parser.parse_args(argv)
     
     thisdict = {
       "selected": "mission",
@@ -530,6 +901,53 @@ def adjust(argv):
     return args, config
 
 
+# parser of the command line arguments, also used by the batch runner
+def get_parser():
+    parser = argparse.ArgumentParser(description='Process oceanet scaw1.') 
+    parser.add_argument('-c', required=True, type=str, dest='cruise', # la variable se guarda en args.id como string
+                    help='Insert the name of the cruise (e.g: PS95 or PS122_1)')
+    parser.add_argument('-i', required=True, type=str, dest='instrument',
+                    help='Name of the instrument')
+    parser.add_argument('--loglevel', default='INFO', dest='loglevel',
+                    help="define loglevel of screen INFO (default) | WARNING | ERROR ")
+    parser.add_argument('--zenit_angle', default=90, type=int, dest='limit_value_zenith_angle_sun_for_flagging',
+                    help="define zenith angle of sun when shortwave data will get a flag (default 90 degree) ")
+    parser.add_argument('--sigma', default=6, type=int, dest='limit_value_sigma_standard_deviation_outlier_flagging',
+                    help="define sigma that is used for outlier flagging of a rolling window (deafult 6) ")
+    parser.add_argument('--duplicates', default='first', choices=['first', 'last', 'mean', 'flag'], dest='duplicates',
+                    help="define handling of duplicated times: keep first (default) | keep last | mean | keep all and flag (ok_flag_duplicate)")
+    parser.add_argument('--sun_grid_step', default=60, type=int, dest='sun_grid_step',
+                    help="define step [s] of the time grid of the sun angles, interpolated to the records (default 60)")
+    parser.add_argument('--exact_sun_angles', action='store_true', dest='exact_sun_angles',
+                    help="compute the sun angles of each record (full resolution, slow)")
+    parser.add_argument('--rolling_window', default=86400, type=int, dest='rolling_window',
+                    help="define centred time window [s] of the rolling mean/std for the outlier flagging (default 86400)")
+    parser.add_argument('--update', action='store_true', dest='update',
+                    help="append the days after the last record of an existing netcdf file (outlier flags of the overlap are recomputed)")
+    parser.add_argument('--quicklook', action='store_true', dest='quicklook',
+                    help="render daily quicklooks to out/quicklooks (days with a png newer than the netcdf file are skipped)")
+    parser.add_argument('--quicklook_workers', default=4, type=int, dest='quicklook_workers',
+                    help="define number of processes to render the quicklooks (default 4)")
+    parser.add_argument('--nc_chunk', default=86400, type=int, dest='nc_chunk',
+                    help="define chunk size (number of records along time) of the netcdf variables (default 86400)")
+    parser.add_argument('--nc_complevel', default=4, type=int, dest='nc_complevel',
+                    help="define zlib compression level 1-9 of the netcdf variables (default 4)")
+    parser.add_argument('--scan_workers', default=8, type=int, dest='scan_workers',
+                    help="define number of threads to scan the level0 directories (default 8)")
+    parser.add_argument('--parse_workers', default=1, type=int, dest='parse_workers',
+                    help="define number of processes to parse the daily files (default 1, no process pool)")
+    parser.add_argument('--cache_dir', default=None, type=str, dest='cache_dir',
+                    help="define directory of the cache files of the parsed daily files (default scaws_cache in path_level1a_csv)")
+    parser.add_argument('--no_cache', action='store_false', dest='cache',
+                    help="do not use/write the cache files of the parsed daily files")
+    parser.add_argument('--catalog', action='store_true', dest='catalog',
+                    help="use the persistent level0 file catalog in path_level1a_csv, rescan only changed directories")
+    parser.add_argument("--disable-feature-processing", action="store_false",
+                    help="switch to plot only, no data processing")
+    
+    return parser
+
+
 #####################################################################################                                                    
 if __name__ == "__main__":
     # execute only if run as a script
@@ -537,18 +955,7 @@ if __name__ == "__main__":
     
     args, config = adjust(sys.argv[1:])
     
-    if(args.disable_feature_processing):
-    
-        total_df = find_scaw1_files( config )
-      
-        total_df = handle_duplicates(args, total_df)
-
-        total_df = flag_sun_angle(args, total_df)
-        total_df = flag_outlier(args, total_df)
-
-        write_data(args, total_df)
-    
-    plot_data(args)
+    sys.exit(main(args, config))
 
 
     #df_multiindex = total_df.set_index(['DT', 'Latitude', 'Longitude'])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides rolling statistics (mean, standard deviation) with time based windows
+
+Parameters
+----------
+Time axis : array of int64 (e.g. nanoseconds since epoch)
+Variables : dict of arrays (e.g. DSR, DLR)
+Window : int (same unit as the time axis, e.g. 24h as nanoseconds)
+
+Processing
+----------
+* the window is centred and time based: [t - window/2, t + window/2],
+  gaps and dropped records do not change the covered time span (unlike a window of rows)
+* window bounds of all records via binary search (numpy searchsorted), once for all variables
+* sums are cumulative sums (float64) of all variables in one pass, O(N) also for tens of millions of records
+* values are shifted by their mean before the accumulation (less cancellation in the variance)
+* NaN values are not counted
+
+Returns
+-------
+dict of variable : (mean, std) arrays
+"""
+
+import logging
+
+import numpy as np
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.rolling')
+
+
+# index bounds [left, right) of the centred time window of each record, times must be sorted
+def get_window_bounds(times, window):
+    times = np.asarray(times, dtype=np.int64)
+    half = window // 2
+
+    left = np.searchsorted(times, times - half, side='left')
+    right = np.searchsorted(times, times + half, side='right')
+
+    return left, right
+
+
+# rolling mean and standard deviation of several variables with a centred time window
+def rolling_mean_std(times, variables, window, ddof=0):
+    times = np.asarray(times, dtype=np.int64)
+    names = list(variables)
+
+    module_logger.info('Rolling statistics of {0} with window {1}, {2} records'.format(names, window, len(times)))
+
+    # time axis must be sorted for the binary search
+    order = None
+    if len(times) > 1 and np.any( np.diff(times) < 0 ):
+        module_logger.warning('Time axis not sorted, records are sorted for the rolling statistics')
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+
+    values = np.column_stack( [ np.asarray(variables[name], dtype=np.float64) for name in names ] )
+    if order is not None:
+        values = values[order]
+
+    valid = ~np.isnan(values)
+    shift = np.nanmean(values, axis=0) if valid.any() else np.zeros(len(names))
+    shift = np.where( np.isnan(shift), 0.0, shift )
+    values = np.where( valid, values - shift, 0.0 )
+
+    left, right = get_window_bounds(times, window)
+
+    # cumulative sums with leading zero: sum of [left, right) = cs[right] - cs[left]
+    def window_sum(a):
+        cs = np.zeros( (a.shape[0] + 1, a.shape[1]) )
+        np.cumsum(a, axis=0, out=cs[1:])
+        return cs[right] - cs[left]
+
+    count = window_sum( valid.astype(np.float64) )
+    total = window_sum( values )
+    total_sq = window_sum( values * values )
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        var = (total_sq - total * mean) / (count - ddof)
+    std = np.sqrt( np.clip(var, 0.0, None) )
+    mean = mean + shift
+
+    # back to the original order of the records
+    if order is not None:
+        inverse = np.argsort(order)
+        mean = mean[inverse]
+        std = std[inverse]
+
+    result = {}
+    for k, name in enumerate(names):
+        result[name] = (mean[:, k], std[:, k])
+
+    return result
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script writes the SCAWS data to a compressed netcdf file, streamed in day sized blocks
+
+Parameters
+----------
+Pathfile of the netcdf file : str
+Metadata : dict (cfjson of scaw1_js_meta_ps122.json, global attributes and variables)
+Time axis : array of int64 (nanoseconds since epoch, UTC, sorted)
+Data : DataFrame (or dict of arrays) with a column for each variable of the metadata (except time)
+
+Processing
+----------
+* the file is created from the metadata with an unlimited time dimension
+* variables are compressed (zlib, shuffle) and chunked along time (default one day of 1 Hz records)
+* the data are written in day sized blocks, the time conversion (int64 nanoseconds to the units
+  of the time variable, see epoch_time) and the type conversion need the memory of one block only
+* the file is written to a temp file and renamed (atomic_file, no broken files, mode under the umask)
+* new records can be appended to an existing file (time dimension is unlimited)
+
+Returns
+-------
+netcdf file
+"""
+
+import os
+import logging
+
+import numpy as np
+import netCDF4
+
+import epoch_time
+import atomic_file
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.scaws_nc')
+
+
+# netcdf types of the types in the metadata
+NC_TYPES = {
+    'int'    : 'i4',
+    'float'  : 'f4',
+    'double' : 'f8',
+}
+
+# index bounds [first, last) of the days of a sorted time axis (int64 nanoseconds)
+def get_day_blocks(times):
+    days = np.asarray(times, dtype=np.int64) // epoch_time.DAY_NS
+    bounds = np.concatenate( ( [0], np.flatnonzero( np.diff(days) ) + 1, [len(days)] ) )
+
+    return list( zip( bounds[:-1], bounds[1:] ) )
+
+
+# create the dimension, variables and global attributes of the metadata
+def create_nc_variables(dataset, cfjson, chunk_records=86400, complevel=4):
+
+    dataset.setncatts( cfjson["attributes"] )
+
+    # time is the unlimited dimension
+    dataset.createDimension('time', None)
+
+    for name, variable in cfjson["variables"].items():
+        attributes = dict( variable["attributes"] )
+        fill_value = attributes.pop('_FillValue', None)
+
+        nc_variable = dataset.createVariable( name, NC_TYPES.get( variable["type"], variable["type"] ), tuple( variable["shape"] ),
+                                              zlib=True, shuffle=True, complevel=complevel,
+                                              chunksizes=( chunk_records, ) * len( variable["shape"] ),
+                                              fill_value=fill_value )
+        nc_variable.setncatts(attributes)
+
+
+# write one block of records to the variables, beginning at index start of the time dimension
+def write_nc_block(dataset, start, times, data, time_units):
+    dataset["time"][start:start + len(times)] = epoch_time.ns_to_time_values(times, time_units)
+
+    for name in dataset.variables:
+        if name == 'time':
+            continue
+        dataset[name][start:start + len(times)] = np.asarray( data[name] ).astype( dataset[name].dtype )
+
+
+# append records to the end of the time dimension, day by day
+def append_nc_data(dataset, times, data):
+    times = np.asarray(times, dtype=np.int64)
+    time_units = dataset["time"].units
+    start = len( dataset.dimensions["time"] )
+
+    blocks = get_day_blocks(times)
+    module_logger.info('Write {0} records in {1} daily blocks'.format(len(times), len(blocks)))
+
+    for first, last in blocks:
+        write_nc_block( dataset, start + first, times[first:last], { name : data[name][first:last] for name in dataset.variables if name != 'time' }, time_units )
+
+
+# write the netcdf file, day by day
+def write_nc_file(nc_file, cfjson, times, data, chunk_records=86400, complevel=4):
+    times = np.asarray(times, dtype=np.int64)
+    time_units = cfjson["variables"]["time"]["attributes"]["units"]
+
+    os.makedirs( os.path.dirname( os.path.abspath(nc_file) ), exist_ok=True )
+    with atomic_file.atomic_file(nc_file, suffix='.nc') as tmp_file:
+        with netCDF4.Dataset(tmp_file, 'w', format='NETCDF4') as dataset:
+            create_nc_variables(dataset, cfjson, chunk_records, complevel)
+
+            append_nc_data(dataset, times, data)
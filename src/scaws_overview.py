@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides overview levels (min/max/mean per time bin) of the SCAWS netcdf file for plotting
+
+Parameters
+----------
+Pathfile of the netcdf file : str (out/<mission>_<instrument>.nc)
+Levels : list of int [s] (default 1 min, 10 min, 1 h, each level divides the largest level)
+
+Processing
+----------
+* each level is a group (overview_<level>s) of the sidecar file out/<mission>_<instrument>_overview.nc,
+  the netcdf file for pangaea is not changed
+* per bin: number of records, min/max/mean of DSR, DLR, szen, sazi and the number of flagged records (flag = 0)
+* the bins are computed in one pass over the sorted int64 times (numpy reduceat)
+* update: the bins from the first changed record (floored to the largest level) are rewritten/appended
+* plots pick the finest level with not more bins than pixels of the figure, the plot time is
+  independent of the length of the mission
+
+Returns
+-------
+overview file, overview data of a level
+"""
+
+import os
+import logging
+
+import numpy as np
+import netCDF4
+
+import epoch_time
+import atomic_file
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.overview')
+
+
+# bin sizes [s] of the overview levels
+OVERVIEW_LEVELS = [60, 600, 3600]
+
+# variables with min/max/mean per bin
+OVERVIEW_VARIABLES = ['DSR', 'DLR', 'szen', 'sazi']
+
+# flags with number of flagged records (flag = 0) per bin
+OVERVIEW_FLAGS = ['ok_flag_dsr_sun_zen', 'ok_flag_dsr_outlier', 'ok_flag_dlr_outlier', 'ok_flag_duplicate']
+
+
+# pathfile of the overview sidecar file of a netcdf file
+def get_overview_file(nc_file):
+    return os.path.splitext(nc_file)[0] + '_overview.nc'
+
+
+# name of the group of a level
+def get_group_name(level):
+    return 'overview_{0}s'.format(level)
+
+
+# overview of one level: start time of the bins (int64 nanoseconds) and columns per bin, times must be sorted
+def compute_overview(times, data, level):
+    times = epoch_time.to_ns(times)
+    bins = times // (level * epoch_time.SECOND_NS)
+
+    is_first = np.ones( len(bins), dtype=bool )
+    is_first[1:] = bins[1:] != bins[:-1]
+    starts = np.flatnonzero(is_first)
+
+    columns = { 'count' : np.diff( np.append(starts, len(bins)) ).astype(np.int32) }
+
+    for name in OVERVIEW_VARIABLES:
+        values = np.asarray(data[name], dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        number = np.add.reduceat( valid.astype(np.int64), starts )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns[name + '_mean'] = np.add.reduceat( np.where(valid, values, 0.0), starts ) / number
+        columns[name + '_min'] = np.minimum.reduceat( np.where(valid, values, np.inf), starts )
+        columns[name + '_max'] = np.maximum.reduceat( np.where(valid, values, -np.inf), starts )
+
+        for key in [ name + '_min', name + '_max' ]:
+            columns[key][number == 0] = np.nan
+
+    for name in OVERVIEW_FLAGS:
+        columns[name + '_flagged'] = np.add.reduceat( ( np.asarray(data[name]) == 0 ).astype(np.int32), starts )
+
+    return bins[starts] * level * epoch_time.SECOND_NS, columns
+
+
+# create the group of a level with the same time units as the netcdf file
+def create_overview_group(dataset, level, time_units):
+    group = dataset.createGroup( get_group_name(level) )
+    group.setncattr('bin_seconds', level)
+    group.createDimension('time', None)
+
+    time = group.createVariable('time', 'f8', ('time',), zlib=True)
+    time.setncatts( { 'units' : time_units, 'standard_name' : 'time', 'long_name' : 'start of the bin' } )
+
+    group.createVariable('count', 'i4', ('time',), zlib=True).setncattr('long_name', 'number of records in the bin')
+
+    for name in OVERVIEW_VARIABLES:
+        for statistic in ['min', 'max', 'mean']:
+            group.createVariable(name + '_' + statistic, 'f4', ('time',), zlib=True, shuffle=True).setncattr('long_name', statistic + ' of ' + name + ' in the bin')
+
+    for name in OVERVIEW_FLAGS:
+        group.createVariable(name + '_flagged', 'i4', ('time',), zlib=True).setncattr('long_name', 'number of records with ' + name + ' = 0 in the bin')
+
+    return group
+
+
+# write the bins of all levels, bins from the first time onwards are rewritten or appended
+# the times must begin at a bin start of the largest level
+def write_overview(dataset, times, data, time_units, levels=OVERVIEW_LEVELS):
+    if len(times) == 0:
+        return
+
+    for level in levels:
+        name = get_group_name(level)
+        group = dataset.groups[name] if name in dataset.groups else create_overview_group(dataset, level, time_units)
+
+        bin_times, columns = compute_overview(times, data, level)
+
+        # index of the first rewritten bin
+        existing = epoch_time.time_values_to_ns( np.ma.filled( group['time'][:], np.nan ), time_units ) if len( group.dimensions['time'] ) > 0 else np.array( [], dtype=np.int64 )
+        start = np.searchsorted(existing, bin_times[0], side='left')
+
+        group['time'][start:start + len(bin_times)] = epoch_time.ns_to_time_values(bin_times, time_units)
+        for key, values in columns.items():
+            group[key][start:start + len(bin_times)] = values
+
+        module_logger.info('Overview {0}: {1} bins written from bin {2}'.format(name, len(bin_times), start))
+
+
+# read the records of the netcdf file from a time onwards (None = all), times as int64 nanoseconds
+# flags missing in the file are treated as all records ok
+def read_nc_records(nc_file, from_time=None):
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        time_units = dataset['time'].units
+        times = epoch_time.time_values_to_ns( np.ma.filled( dataset['time'][:], np.nan ), time_units )
+
+        first = 0 if from_time is None else np.searchsorted(times, from_time, side='left')
+        data = { name : np.ma.filled( dataset[name][first:], np.nan if dataset[name].dtype.kind == 'f' else 0 ) for name in OVERVIEW_VARIABLES }
+
+        # a flag missing in the file (e.g. ok_flag_duplicate in files of older versions): all records ok
+        for name in OVERVIEW_FLAGS:
+            if name in dataset.variables:
+                data[name] = np.ma.filled( dataset[name][first:], 0 )
+            else:
+                data[name] = np.ones( len(times) - first, dtype=np.int8 )
+
+    return times[first:], data, time_units
+
+
+# write a new overview file (atomic_file: temp file, then rename)
+def write_overview_file(overview_file, times, data, time_units, levels=OVERVIEW_LEVELS):
+    with atomic_file.atomic_file(overview_file, suffix='.nc') as tmp_file:
+        with netCDF4.Dataset(tmp_file, 'w', format='NETCDF4') as dataset:
+            dataset.setncattr('title', 'overview levels (min/max/mean per bin) of ' + os.path.basename(overview_file).replace('_overview', ''))
+            write_overview(dataset, times, data, time_units, levels)
+
+    module_logger.info('Write overview file: ' + overview_file)
+
+
+# update the overview file of a netcdf file from a time onwards (changed/appended records)
+# a missing overview file is built from all records
+def update_overview_file(nc_file, from_time=None, levels=OVERVIEW_LEVELS):
+    overview_file = get_overview_file(nc_file)
+
+    if from_time is None or not os.path.isfile(overview_file):
+        times, data, time_units = read_nc_records(nc_file)
+        write_overview_file(overview_file, times, data, time_units, levels)
+        return overview_file
+
+    # bins of all levels are complete from a start of the largest level
+    largest = max(levels) * epoch_time.SECOND_NS
+    times, data, time_units = read_nc_records(nc_file, from_time - from_time % largest)
+
+    with netCDF4.Dataset(overview_file, 'a') as dataset:
+        write_overview(dataset, times, data, time_units, levels)
+
+    module_logger.info('Update overview file: ' + overview_file)
+
+    return overview_file
+
+
+# finest level with not more bins than the pixel width (coarsest level if all levels have more bins)
+def select_level(overview_file, width_pixel):
+    with netCDF4.Dataset(overview_file, 'r') as dataset:
+        levels = sorted( group.getncattr('bin_seconds') for group in dataset.groups.values() )
+
+        for level in levels:
+            if len( dataset.groups[ get_group_name(level) ].dimensions['time'] ) <= width_pixel:
+                return level
+
+    return levels[-1]
+
+
+# overview of a level: start time of the bins (int64 nanoseconds) and columns per bin
+def read_overview(overview_file, level):
+    with netCDF4.Dataset(overview_file, 'r') as dataset:
+        group = dataset.groups[ get_group_name(level) ]
+
+        times = epoch_time.time_values_to_ns( np.ma.filled( group['time'][:], np.nan ), group['time'].units )
+        columns = { name : np.ma.filled( group[name][:], np.nan if group[name].dtype.kind == 'f' else 0 ) for name in group.variables if name != 'time' }
+
+    return times, columns
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script renders daily quicklooks (DSR/DLR, sun angles, flags) of the SCAWS netcdf file
+
+Parameters
+----------
+Pathfile of the netcdf file : str (out/<mission>_<instrument>.nc)
+Output directory : str (default out/quicklooks)
+Number of processes : int
+
+Processing
+----------
+* the days are rendered in a process pool with the non interactive Agg backend
+* each worker creates the figure, axes and lines once, for each day only the data of the lines,
+  the limits and the legends are set (no new figure per day)
+* each worker reads only the slice of its day from the netcdf file
+* a day is skipped if its png is newer than the netcdf file
+* update mode: only the days from the first changed record onwards are rendered again (appended records and
+  recomputed flags), earlier days only if their png is missing
+* the png is written to a temp file and renamed (atomic_file, mode under the umask)
+
+Returns
+-------
+png file per day: <output directory>/<mission>_<instrument>_<YYYY-MM-DD>.png
+"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import netCDF4
+
+import epoch_time
+import scaws_nc
+import atomic_file
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.quicklook')
+
+
+# variables of a quicklook
+QUICKLOOK_VARIABLES = ['DSR', 'DLR', 'szen', 'sazi', 'ok_flag_dsr_outlier', 'ok_flag_dlr_outlier', 'ok_flag_dsr_sun_zen']
+
+# figure template of a worker process
+template = None
+
+
+# pathfile of the quicklook of a day
+def get_quicklook_file(output_dir, mission, instrument, day):
+    return os.path.join( output_dir, '{0}_{1}_{2}.png'.format( mission, instrument, epoch_time.to_string( [day], '%Y-%m-%d' )[0] ) )
+
+
+# days of the netcdf file: (day as int64 nanoseconds, first record, last record + 1)
+def get_days(nc_file):
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        times = epoch_time.time_values_to_ns( np.ma.filled( dataset['time'][:], np.nan ), dataset['time'].units )
+
+    return [ ( epoch_time.floor_day( times[first] ), first, last ) for first, last in scaws_nc.get_day_blocks(times) ]
+
+
+# setup of a worker process: Agg backend, figure template with all axes and lines
+def init_quicklook_worker():
+    global template
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(3, figsize=(10, 10), sharex=True)
+    ax_dlr = ax[0].twinx()
+    ax_sazi = ax[1].twinx()
+
+    lines = {
+        'DSR'          : ax[0].plot([], [], color='tab:red', label='Shortwave radiation flux')[0],
+        'dsr_outlier'  : ax[0].plot([], [], marker='o', ls='', color='peru')[0],
+        'DLR'          : ax_dlr.plot([], [], color='tab:blue', label='Longwave radiation flux')[0],
+        'dlr_outlier'  : ax_dlr.plot([], [], marker='o', ls='', color='magenta')[0],
+        'szen'         : ax[1].plot([], [], color='tab:green', label='Zenit angle')[0],
+        'sazi'         : ax_sazi.plot([], [], color='tab:orange', label='Azimuth angle')[0],
+        'DSR_2'        : ax[2].plot([], [], color='tab:red', label='Shortwave radiation')[0],
+        'dsr_sun_zen'  : ax[2].plot([], [], marker='o', ls='', color='green')[0],
+    }
+
+    # date axis before the first data (lines are created empty)
+    for axis in [ ax[0], ax_dlr, ax[1], ax_sazi, ax[2] ]:
+        axis.xaxis_date()
+
+    ax[0].set_ylabel('DSR flux [W*m^{-2}]', color='tab:red')
+    ax_dlr.set_ylabel('DLR flux [W*m^{-2}]', color='tab:blue')
+    ax[1].set_ylabel('Zenith angle', color='tab:green')
+    ax_sazi.set_ylabel('Azimuth angle', color='tab:orange')
+    ax[2].set_ylabel('DSR flux [W*m^{-2}]', color='tab:red')
+    ax[2].set_xlabel('Date and Time [UTC]')
+
+    template = { 'fig' : fig, 'axes' : [ ax[0], ax_dlr, ax[1], ax_sazi, ax[2] ], 'lines' : lines }
+
+
+# render the quicklook of one day (executed in a worker process)
+def render_day(nc_file, png_file, day, first, last, title, sigma, zenith_angle):
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        time = epoch_time.to_datetime64( epoch_time.time_values_to_ns( np.ma.filled( dataset['time'][first:last], np.nan ), dataset['time'].units ) )
+        data = { name : np.ma.filled( dataset[name][first:last], np.nan if dataset[name].dtype.kind == 'f' else 0 ) for name in QUICKLOOK_VARIABLES }
+
+    fig = template['fig']
+    lines = template['lines']
+    ax_dsr, ax_dlr, ax_szen, ax_sazi, ax_flag = template['axes']
+
+    outlier_dsr = data['ok_flag_dsr_outlier'] == 0
+    outlier_dlr = data['ok_flag_dlr_outlier'] == 0
+    flagged_zenith_dsr = data['ok_flag_dsr_sun_zen'] == 0
+
+    lines['DSR'].set_data(time, data['DSR'])
+    lines['dsr_outlier'].set_data(time[outlier_dsr], data['DSR'][outlier_dsr])
+    lines['dsr_outlier'].set_label('Flag outlier $\\sigma>$' + str(sigma) + ', flags = ' + str(outlier_dsr.sum()))
+    lines['DLR'].set_data(time, data['DLR'])
+    lines['dlr_outlier'].set_data(time[outlier_dlr], data['DLR'][outlier_dlr])
+    lines['dlr_outlier'].set_label('Flag outlier $\\sigma>$' + str(sigma) + ', flags = ' + str(outlier_dlr.sum()))
+    lines['szen'].set_data(time, data['szen'])
+    lines['sazi'].set_data(time, data['sazi'])
+    lines['DSR_2'].set_data(time, data['DSR'])
+    lines['dsr_sun_zen'].set_data(time[flagged_zenith_dsr], data['DSR'][flagged_zenith_dsr])
+    lines['dsr_sun_zen'].set_label('Flag (sun zenit angle > ' + str(zenith_angle) + '), flags = ' + str(flagged_zenith_dsr.sum()))
+
+    for ax in template['axes']:
+        ax.relim()
+        ax.autoscale_view()
+
+    day_start = epoch_time.to_datetime64( [day] )[0]
+    ax_dsr.set_xlim( day_start, day_start + np.timedelta64(1, 'D') )
+
+    ax_dsr.set_title('Surface downwelling flux and outlier flags at ' + title)
+    ax_szen.set_title('Sun angle at ' + title)
+    ax_flag.set_title('Surface downwelling shortwave flux and sun angle flags at ' + title)
+
+    # legends of the twin axes in one legend
+    for ax, twin in [ (ax_dsr, ax_dlr), (ax_szen, ax_sazi), (ax_flag, None) ]:
+        handles = ax.get_lines() + ( twin.get_lines() if twin else [] )
+        ax.legend(handles, [ line.get_label() for line in handles ], loc=0, framealpha=0.9, fontsize=8)
+
+    fig.tight_layout()
+
+    with atomic_file.atomic_file(png_file, suffix='.png') as tmp_file:
+        fig.savefig(tmp_file, dpi=100)
+
+    return png_file, len(time)
+
+
+# render the quicklooks of all days in a process pool, days with a png newer than the netcdf file are skipped
+# if update only the days from from_time onwards (first changed record, None: no change) and days without png are rendered
+# returns the number of days which could not be rendered
+def render_quicklooks(nc_file, output_dir, mission, instrument, max_workers=4, update=False, from_time=None):
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        sigma = dataset.getncattr('limit_value_sigma_standard_deviation_outlier_flagging')
+        zenith_angle = dataset.getncattr('limit_value_zenith_angle_sun_for_flagging')
+
+    os.makedirs(output_dir, exist_ok=True)
+    nc_mtime = os.stat(nc_file).st_mtime_ns
+
+    jobs = []
+    for day, first, last in get_days(nc_file):
+        png_file = get_quicklook_file(output_dir, mission, instrument, day)
+
+        if os.path.isfile(png_file):
+            if update and ( from_time is None or day < epoch_time.floor_day(from_time) ):
+                continue
+            
+            if not update and os.stat(png_file).st_mtime_ns > nc_mtime:
+                continue
+
+        title = mission + ' ' + epoch_time.to_string( [day], '%Y-%m-%d' )[0]
+        jobs.append( (nc_file, png_file, day, first, last, title, sigma, zenith_angle) )
+
+    module_logger.info('Render {0} daily quicklooks with {1} processes: {2}'.format( len(jobs), max_workers, output_dir ) )
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, max_workers), initializer=init_quicklook_worker) as executor:
+        futures = { executor.submit(render_day, *job) : job[1] for job in jobs }
+
+        for future in as_completed(futures):
+            try:
+                png_file, records = future.result()
+                module_logger.debug('Quicklook written ({0} records): {1}'.format(records, png_file))
+            except Exception as e:
+                failed = failed + 1
+                module_logger.error('Quicklook not written: ' + futures[future] + ' (' + str(e) + ')')
+
+    return failed
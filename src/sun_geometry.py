@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides the sun geometry (zenith, azimuth) of a high resolution time series (e.g. 1 Hz radiation)
+
+Parameters
+----------
+Time axis : array of int64 (nanoseconds since epoch, UTC)
+Latitude, Longitude : arrays [degree] (position of each record, e.g. ship track)
+Step of the coarse time grid : int [s] (None = exact computation of each record)
+
+Processing
+----------
+* the ephemeris (trosat.sunpos.sun_angles) is evaluated on a coarse time grid only,
+  grid nodes are the full steps before and after each record (no nodes within data gaps)
+* positions at the grid nodes are interpolated along the track (longitude unwrapped)
+* zenith is interpolated linearly, azimuth linearly after unwrapping (no jump at 0/360 degree)
+* records are processed in chunks, the memory of the intermediate arrays is bounded
+* error bound of the linear interpolation: step^2 / 8 * max |d^2 angle / dt^2|,
+  for a step of 60 s the zenith error is below 0.001 degree (sun not close to the zenith),
+  close to the zenith (zenith < 1 degree) below 0.15 degree, the azimuth can be less accurate there
+* the flagging threshold of the zenith is usually 90 degree, where the error is ~1e-4 degree
+
+Returns
+-------
+zenith, azimuth : arrays [degree]
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+# pip install git+https://github.com/hdeneke/trosat-base
+from trosat import sunpos as sp
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.sun')
+
+
+# exact sun angles of records, time as int64 nanoseconds
+def exact_sun_angles(times, lat, lon):
+    szen, sazi = sp.sun_angles( pd.Series( pd.to_datetime(times, utc=True) ), lat, lon )
+
+    return np.asarray(szen, dtype=np.float64), np.asarray(sazi, dtype=np.float64)
+
+
+# unwrap an angle in degree (no jumps larger than 180 degree)
+def unwrap_degree(angle):
+    return np.rad2deg( np.unwrap( np.deg2rad(angle) ) )
+
+
+# sun angles of a chunk of records via a coarse time grid
+def coarse_sun_angles(times, lat, lon, step_ns):
+    # grid nodes before and after each record
+    cells = np.unique( times // step_ns )
+    grid = np.unique( np.concatenate( (cells, cells + 1) ) ) * step_ns
+
+    # positions at the grid nodes along the track
+    lon_unwrapped = unwrap_degree(lon)
+    grid_lat = np.interp( grid, times, lat )
+    grid_lon = ( np.interp( grid, times, lon_unwrapped ) + 180.0 ) % 360.0 - 180.0
+
+    grid_szen, grid_sazi = exact_sun_angles(grid, grid_lat, grid_lon)
+
+    szen = np.interp( times, grid, grid_szen )
+    sazi = np.interp( times, grid, unwrap_degree(grid_sazi) ) % 360.0
+
+    return szen, sazi
+
+
+# sun angles of all records, time as int64 nanoseconds (sorted), step [s] of the coarse grid (None = exact)
+def sun_angles(times, lat, lon, step=60, chunksize=1000000):
+    times = np.asarray(times, dtype=np.int64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+
+    szen = np.empty( len(times) )
+    sazi = np.empty( len(times) )
+
+    if step:
+        module_logger.info('Sun angles of {0} records via time grid of {1} s'.format(len(times), step))
+    else:
+        module_logger.info('Sun angles of {0} records, exact computation of each record'.format(len(times)))
+
+    for start in range(0, len(times), chunksize):
+        chunk = slice(start, start + chunksize)
+
+        if step:
+            szen[chunk], sazi[chunk] = coarse_sun_angles( times[chunk], lat[chunk], lon[chunk], int(step * 1e9) )
+        else:
+            szen[chunk], sazi[chunk] = exact_sun_angles( times[chunk], lat[chunk], lon[chunk] )
+
+    return szen, sazi
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""The script provides a local piecewise cubic interpolation of a track (e.g. Polarstern mastertrack)
+
+Parameters
+----------
+Time axis of the track : array (e.g. diff_seconds, sorted)
+Values of the track : array (e.g. Latitude)
+Maximum gap : float (optional, same unit as the time axis)
+
+Processing
+----------
+* the interpolation is local: cubic Hermite segments between two track points,
+  slopes from the neighbouring points (no global spline system as interp1d(kind='cubic'))
+* the segment of each query time is found via binary search (numpy searchsorted)
+* query times are processed in chunks, the memory is bounded also for millions of query times
+* track points with NaN values are not used
+* results outside the track or within a gap larger than the maximum gap are NaN (masked)
+* a growing track (watch mode) is extended by the appended points, only the slope of the former last point
+  and the new segments are computed (arrays with spare capacity)
+
+Returns
+-------
+interpolation function f(query_times) -> values
+"""
+
+import logging
+
+import numpy as np
+
+
+""" Create logger, name important """
+module_logger = logging.getLogger('oceanet.interpol')
+
+
+# create the interpolation function of a track
+def local_cubic_interpolator(x, y, max_gap=None, chunksize=1000000):
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # remove track points without values
+    ok = ~( np.isnan(x) | np.isnan(y) )
+    x = x[ok]
+    y = y[ok]
+
+    # time axis must be strictly increasing, keep first of duplicated times
+    if len(x) > 1 and not np.all( np.diff(x) > 0 ):
+        module_logger.warning('Time axis of track not strictly increasing, track is sorted and duplicates are removed')
+        order = np.argsort(x, kind='stable')
+        x = x[order]
+        y = y[order]
+        first = np.concatenate( ([True], np.diff(x) > 0) )
+        x = x[first]
+        y = y[first]
+
+    if len(x) < 2:
+        module_logger.error('Interpolation not possible, less than 2 track points')
+
+    # points, segment lengths and slopes, the first n entries are valid
+    track = { 'n' : 0, 'x' : np.empty(0), 'y' : np.empty(0), 'h' : np.empty(0), 'slopes' : np.empty(0) }
+    append_points(track, x, y)
+
+    def interpolate(xq):
+        xq = np.asarray(xq, dtype=np.float64)
+        flat = xq.ravel()
+        result = np.full( flat.shape, np.nan )
+
+        n = track['n']
+        if n < 2:
+            return result.reshape(xq.shape)
+
+        x = track['x'][:n]
+        y = track['y'][:n]
+        h = track['h'][:n - 1]
+        slopes = track['slopes'][:n]
+
+        for start in range(0, len(flat), chunksize):
+            q = flat[start:start + chunksize]
+
+            # segment index via binary search
+            i = np.searchsorted(x, q, side='right') - 1
+            i = np.clip(i, 0, len(x) - 2)
+
+            hi = h[i]
+            t = (q - x[i]) / hi
+            t2 = t * t
+            t3 = t2 * t
+
+            # cubic Hermite basis
+            value = ( (2 * t3 - 3 * t2 + 1) * y[i]
+                    + (t3 - 2 * t2 + t) * hi * slopes[i]
+                    + (-2 * t3 + 3 * t2) * y[i + 1]
+                    + (t3 - t2) * hi * slopes[i + 1] )
+
+            inside = (q >= x[0]) & (q <= x[-1])
+            if max_gap is not None:
+                inside &= hi <= max_gap
+
+            result[start:start + chunksize] = np.where(inside, value, np.nan)
+
+        return result.reshape(xq.shape)
+
+    interpolate.track = track
+
+    return interpolate
+
+
+# extend the interpolation function of a growing track by points after the end of the track
+# points without values or not later than the end of the track are not used
+def extend_interpolator(interpolate, x, y):
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    track = interpolate.track
+    n = track['n']
+
+    ok = ~( np.isnan(x) | np.isnan(y) )
+    if n > 0:
+        ok &= x > track['x'][n - 1]
+
+    x = x[ok]
+    y = y[ok]
+
+    # time axis of the appended points must be strictly increasing, points not later than a previous point are not used
+    if len(x) > 1 and not np.all( np.diff(x) > 0 ):
+        first = np.concatenate( ([True], x[1:] > np.maximum.accumulate(x)[:-1]) )
+        x = x[first]
+        y = y[first]
+
+    append_points(track, x, y)
+
+
+# append points (strictly increasing, after the end of the track) to the arrays of a track
+# the slopes of the former last point and of the new points are computed
+def append_points(track, x, y):
+
+    n = track['n']
+    m = n + len(x)
+
+    if len(x) == 0:
+        return
+
+    # grow the arrays with spare capacity (amortised constant time per point)
+    if m > len(track['x']):
+        capacity = max( m, 2 * len(track['x']) )
+        for key in [ 'x', 'y', 'h', 'slopes' ]:
+            grown = np.empty(capacity)
+            grown[:n] = track[key][:n]
+            track[key] = grown
+
+    xs = track['x']
+    ys = track['y']
+    xs[n:m] = x
+    ys[n:m] = y
+
+    track['n'] = m
+    if m < 2:
+        return
+
+    # new segments, starting with the segment of the former last point
+    first = max(n - 1, 0)
+    track['h'][first:m - 1] = np.diff( xs[first:m] )
+
+    # slopes: central secant inside, one-sided at the ends
+    slopes = track['slopes']
+    slopes[0] = ( ys[1] - ys[0] ) / ( xs[1] - xs[0] )
+    slopes[m - 1] = ( ys[m - 1] - ys[m - 2] ) / ( xs[m - 1] - xs[m - 2] )
+
+    inner = np.arange( max(n - 1, 1), m - 1 )
+    slopes[inner] = ( ys[inner + 1] - ys[inner - 1] ) / ( xs[inner + 1] - xs[inner - 1] )
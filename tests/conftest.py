@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+# the scripts in src are imported as modules (flat layout, no package)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'src'))
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+
+import file_cache
+
+
+def test_cache_file_is_invalidated_by_size_and_mtime(tmp_path):
+    source = tmp_path / 'track.txt'
+    source.write_text('first version\n')
+    os.utime(source, ns=(1570000000 * 10**9, 1570000000 * 10**9))
+
+    cache_file = file_cache.get_cache_file(str(source), '.track.npy')
+    assert file_cache.write_cache_file(cache_file, str(source), '.track.npy', np.arange(3))
+    assert np.load(cache_file).tolist() == [0, 1, 2]
+
+    # same key for the unchanged source
+    assert file_cache.get_cache_file(str(source), '.track.npy') == cache_file
+
+    # modified source (size and mtime): new key, the stale cache file is removed after writing the new one
+    source.write_text('second version\n')
+    new_cache_file = file_cache.get_cache_file(str(source), '.track.npy')
+    assert new_cache_file != cache_file
+
+    file_cache.write_cache_file(new_cache_file, str(source), '.track.npy', np.arange(4))
+    assert not os.path.exists(cache_file)
+    assert sorted( os.listdir(tmp_path) ) == [ os.path.basename(new_cache_file), 'track.txt' ]
+
+
+def test_cache_dir_and_npz(tmp_path):
+    source = tmp_path / 'SCAWS_1-data-saved-on-20191006'
+    source.write_text('data\n')
+
+    cache_file = file_cache.get_cache_file(str(source), '.scaws.npz', str(tmp_path / 'cache'))
+    assert os.path.dirname(cache_file) == str(tmp_path / 'cache')
+
+    file_cache.write_cache_file(cache_file, str(source), '.scaws.npz', { 'DSR' : np.ones(2, dtype=np.float32) })
+    with np.load(cache_file) as data:
+        assert data['DSR'].dtype == np.float32
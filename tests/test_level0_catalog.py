@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import level0_catalog
+
+
+# level0 directories of three days with two images each
+def make_level0(tmp_path):
+    patterns = []
+    for day in ['2019-10-06', '2019-10-07', '2019-10-08']:
+        day_dir = tmp_path / 'level0' / day
+        day_dir.mkdir(parents=True)
+        for name in ['000000_0001.JPG', '000010_0002.JPG']:
+            (day_dir / name).write_bytes(b'jpg')
+        patterns.append( str(day_dir / '*.JPG') )
+
+    return patterns
+
+
+def test_get_files_restricted_to_patterns(tmp_path, monkeypatch):
+    patterns = make_level0(tmp_path)
+
+    connection = level0_catalog.open_catalog( str(tmp_path / level0_catalog.CATALOG_FILENAME) )
+    level0_catalog.update_catalog(connection, 'PS122_1', 'tsi', patterns, max_workers=2)
+
+    assert len( level0_catalog.get_files(connection, 'PS122_1', 'tsi') ) == 6
+
+    # one query per pattern, rows in pattern (date) order
+    monkeypatch.setattr(level0_catalog, 'MAX_SQL_VARIABLES', 1)
+    rows = level0_catalog.get_files(connection, 'PS122_1', 'tsi', [ patterns[2], patterns[0] ])
+
+    assert [ row[0] for row in rows ] == [ patterns[0], patterns[0], patterns[2], patterns[2] ]
+    assert [ os.path.basename(row[1]) for row in rows ] == [ '000000_0001.JPG', '000010_0002.JPG' ] * 2
+
+    assert level0_catalog.get_files(connection, 'PS122_1', 'tsi', []) == []
+    assert level0_catalog.get_files(connection, 'PS122_1', 'other', patterns) == []
+
+    connection.close()
+
+
+def test_update_catalog_rescans_changed_directories_only(tmp_path, monkeypatch):
+    patterns = make_level0(tmp_path)
+
+    connection = level0_catalog.open_catalog( str(tmp_path / level0_catalog.CATALOG_FILENAME) )
+    level0_catalog.update_catalog(connection, 'PS122_1', 'tsi', patterns, max_workers=2)
+
+    # new image in the directory of the second day (directory mtime changes)
+    day_dir = os.path.dirname(patterns[1])
+    open( os.path.join(day_dir, '000020_0003.JPG'), 'wb' ).close()
+    os.utime(day_dir, ns=(1570000000 * 10**9, 1570000000 * 10**9))
+
+    scanned = []
+    walk_level0 = level0_catalog.level0_walker.walk_level0
+
+    def recording_walk_level0(path_filenames_level0, **kwargs):
+        scanned.extend(path_filenames_level0)
+        return walk_level0(path_filenames_level0, **kwargs)
+
+    monkeypatch.setattr(level0_catalog.level0_walker, 'walk_level0', recording_walk_level0)
+
+    level0_catalog.update_catalog(connection, 'PS122_1', 'tsi', patterns, max_workers=2)
+    assert scanned == [ patterns[1] ]
+
+    rows = level0_catalog.get_files(connection, 'PS122_1', 'tsi')
+    assert len(rows) == 7
+    assert [ os.path.basename(row[1]) for row in rows if row[0] == patterns[1] ] == [ '000000_0001.JPG', '000010_0002.JPG', '000020_0003.JPG' ]
+
+    # removed directory: its files are removed from the catalog
+    for name in os.listdir( os.path.dirname(patterns[2]) ):
+        os.remove( os.path.join( os.path.dirname(patterns[2]), name ) )
+    os.rmdir( os.path.dirname(patterns[2]) )
+
+    level0_catalog.update_catalog(connection, 'PS122_1', 'tsi', patterns, max_workers=2)
+    assert len( level0_catalog.get_files(connection, 'PS122_1', 'tsi') ) == 5
+
+    connection.close()
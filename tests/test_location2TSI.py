@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime
+
+import pytest
+
+# location2TSI imports numpy/pandas/cartopy/matplotlib at module level
+location2TSI = pytest.importorskip('location2TSI')
+
+import numpy as np
+
+import file_cache
+
+
+# mastertrack in pangaea txt format
+def write_track_file(pathfile):
+    with open(pathfile, 'w') as f:
+        f.write('Date/Time (UTC)\tLatitude\tLongitude\n')
+        f.write('2019-10-06T00:00:00\t69.68\t18.99\n')
+        f.write('2019-10-06T00:01:00\t69.69\t19.00\n')
+        f.write('2019-10-06T00:02:00\t69.70\t19.01\n')
+
+
+def test_read_my_file_corrupt_cache_is_reparsed(tmp_path):
+    track_pathfile = str(tmp_path / 'PS122_1_link-to-mastertrack.txt')
+    write_track_file(track_pathfile)
+
+    # truncated cache file of the current track file
+    cache_file = file_cache.get_cache_file(track_pathfile, location2TSI.TRACK_CACHE_SUFFIX)
+    with open(cache_file, 'wb') as f:
+        f.write(b'\x93NUMPY\x01\x00')
+
+    df, df_firstdate = location2TSI.read_my_file(track_pathfile, use_cache=True)
+
+    assert len(df) == 3
+    assert df['Latitude'].tolist() == [69.68, 69.69, 69.70]
+    assert df['diff_seconds'].tolist() == [0.0, 60.0, 120.0]
+
+    # the cache file is written again and readable
+    track = np.load(cache_file)
+    assert track['time'].tolist() == df['DateTime [UTC]'].tolist()
+
+    df_cached, df_firstdate_cached = location2TSI.read_my_file(track_pathfile, use_cache=True)
+    assert df_cached['Longitude'].tolist() == df['Longitude'].tolist()
+    assert df_firstdate_cached == df_firstdate
+
+
+def test_exposure_datetimes_impossible_time_uses_mtime(tmp_path):
+    day_dir = tmp_path / '2019-10-06'
+    day_dir.mkdir()
+
+    valid_file = day_dir / '002136_0001.JPG'
+    impossible_file = day_dir / '250000_0003.JPG'
+    valid_file.write_bytes(b'')
+    impossible_file.write_bytes(b'')
+
+    # mtime 2019-10-06 12:00:00 UTC
+    mtime = 1570363200
+    os.utime(impossible_file, (mtime, mtime))
+
+    day = location2TSI.collect_dfpics_day( [ str(valid_file), str(impossible_file) ] )
+
+    assert day['basename'].tolist() == [ '002136_0001.JPG', '250000_0003.JPG' ]
+
+    # time from the filename, date from the directory
+    assert day['exposure_ns'][0] == np.datetime64('2019-10-06T00:21:36', 'ns').astype(np.int64)
+
+    # impossible time 25:00:00: local time of the stat mtime (as datetime.fromtimestamp)
+    expected = np.datetime64( datetime.fromtimestamp(mtime).strftime('%Y-%m-%dT%H:%M:%S'), 'ns' ).astype(np.int64)
+    assert day['exposure_ns'][1] == expected
+
+
+def test_track_increment_skips_partial_last_line(tmp_path):
+    track_pathfile = str(tmp_path / 'PS122_1_link-to-mastertrack.txt')
+    write_track_file(track_pathfile)
+
+    # one complete and one partial line (no longitude yet) are appended
+    with open(track_pathfile, 'a') as f:
+        f.write('2019-10-06T00:03:00\t69.71\t19.02\n')
+        f.write('2019-10-06T00:04:00\t69.7')
+
+    df, df_firstdate, columns, offset = location2TSI.load_track(track_pathfile)
+    assert df['Latitude'].tolist() == [69.68, 69.69, 69.70, 69.71]
+    assert df['diff_seconds'].tolist() == [0.0, 60.0, 120.0, 180.0]
+
+    # the completed line is read with the next event
+    with open(track_pathfile, 'a') as f:
+        f.write('2\t19.03\n')
+
+    f2_lat, f2_lon = location2TSI.get_interpol_parameters(df)
+    assert np.isnan( f2_lat([240.0]) )[0]
+
+    new_df, offset = location2TSI.read_track_increment(track_pathfile, columns, offset)
+    assert new_df['Latitude'].tolist() == [69.72]
+    assert offset == os.path.getsize(track_pathfile)
+
+    # the extended interpolation equals the interpolation of the complete track
+    location2TSI.extend_interpol_parameters(f2_lat, f2_lon, new_df, df_firstdate)
+
+    df_full, df_firstdate, columns, offset = location2TSI.load_track(track_pathfile)
+    f2_lat_full, f2_lon_full = location2TSI.get_interpol_parameters(df_full)
+
+    query = np.linspace(0.0, 240.0, 17)
+    np.testing.assert_allclose( f2_lat(query), f2_lat_full(query) )
+    np.testing.assert_allclose( f2_lon(query), f2_lon_full(query) )
+    assert f2_lat([240.0])[0] == pytest.approx(69.72)
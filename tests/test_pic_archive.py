@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+
+import pic_archive
+
+
+# two images of a day
+def make_images(tmp_path):
+    image_dir = tmp_path / 'level0'
+    image_dir.mkdir()
+
+    fullpaths = []
+    for name, content in [ ('002136_0001.JPG', b'first'), ('002206_0002.JPG', b'second image') ]:
+        (image_dir / name).write_bytes(content)
+        fullpaths.append( str(image_dir / name) )
+
+    return fullpaths, [ 'PS122_1_tsi_20191006002136.jpg', 'PS122_1_tsi_20191006002206.jpg' ]
+
+
+def test_link_tree_manifest_and_rebuild(tmp_path):
+    fullpaths, arcnames = make_images(tmp_path)
+    output_dir = str(tmp_path / 'PS122_1_tsi_2019-10-06')
+
+    output_dir, status = pic_archive.build_link_tree(output_dir, fullpaths, arcnames, mode='hardlink')
+    assert status.startswith('written')
+
+    lines = (tmp_path / 'PS122_1_tsi_2019-10-06' / pic_archive.MANIFEST_FILENAME).read_text().splitlines()
+    assert lines[0] == '# digest ' + pic_archive.get_filelist_digest(fullpaths, arcnames)
+    assert [ line.split('\t')[0] for line in lines[1:] ] == [ '5', '12' ]
+    assert [ line.split('\t')[2] for line in lines[1:] ] == arcnames
+    assert os.path.samefile( os.path.join(output_dir, arcnames[0]), fullpaths[0] )
+
+    # unchanged images: skipped, changed image: directory built again
+    assert pic_archive.build_link_tree(output_dir, fullpaths, arcnames)[1].startswith('skipped')
+
+    with open(fullpaths[1], 'ab') as f:
+        f.write(b'!')
+    assert pic_archive.build_link_tree(output_dir, fullpaths, arcnames)[1].startswith('written')
+    assert sorted( os.listdir(tmp_path) ) == [ 'PS122_1_tsi_2019-10-06', 'level0' ]
+
+
+def test_link_tree_checksum_manifest(tmp_path):
+    fullpaths, arcnames = make_images(tmp_path)
+    output_dir = str(tmp_path / 'PS122_1_tsi_2019-10-06')
+
+    pic_archive.build_link_tree(output_dir, fullpaths, arcnames, mode='symlink', checksum=True)
+
+    # sha256sum format
+    lines = (tmp_path / 'PS122_1_tsi_2019-10-06' / pic_archive.MANIFEST_CHECKSUM_FILENAME).read_text().splitlines()
+    assert lines[1] == hashlib.sha256(b'first').hexdigest() + '  ' + arcnames[0]
+    assert os.path.islink( os.path.join(output_dir, arcnames[1]) )
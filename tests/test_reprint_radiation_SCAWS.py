@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+# reprint_radiation_SCAWS imports trosat/xarray/netCDF4 at module level
+reprint_radiation_SCAWS = pytest.importorskip('reprint_radiation_SCAWS')
+
+import numpy as np
+import netCDF4
+
+import get_toml_config
+import scaws_overview
+
+
+# line of a daily SCAW1 file (quoted values, columns of mapping_table set)
+def scaw1_line(time, latitude, longitude, dsr, dlr):
+    values = [ '0' ] * 21
+    values[0] = time
+    values[5] = str(latitude)
+    values[6] = str(longitude)
+    values[19] = str(dsr)
+    values[20] = str(dlr)
+    return ','.join( '"' + value + '"' for value in values ) + '\n'
+
+
+def test_clean_scaw1_file_drops_unparseable_time(tmp_path):
+    pathfile = tmp_path / 'SCAWS_1-data-saved-on-20191006'
+    pathfile.write_text( scaw1_line('2019-10-06 00:00:00', 69.68, 18.99, 10.0, 300.0)
+                       + scaw1_line('', 69.69, 19.00, 11.0, 301.0)
+                       + scaw1_line('2019-10-06 00:00:02', 69.70, 19.01, 12.0, 302.0) )
+
+    df = reprint_radiation_SCAWS.clean_scaw1_file(str(pathfile))
+
+    assert df['DateTime [UTC]'].tolist() == [ np.datetime64('2019-10-06T00:00:00', 'ns').astype(np.int64),
+                                              np.datetime64('2019-10-06T00:00:02', 'ns').astype(np.int64) ]
+    assert df['DSR'].tolist() == [10.0, 12.0]
+
+
+def test_duplicates_first_last_keep_file_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    pathfile = tmp_path / 'SCAWS_1-data-saved-on-20191006'
+    pathfile.write_text( scaw1_line('2019-10-06 00:00:01', 69.68, 18.99, 10.0, 300.0)
+                       + scaw1_line('2019-10-06 00:00:00', 69.69, 19.00, 11.0, 301.0)
+                       + scaw1_line('2019-10-06 00:00:01', 69.70, 19.01, 12.0, 302.0) )
+
+    df = reprint_radiation_SCAWS.clean_scaw1_file(str(pathfile))
+    assert df['DSR'].tolist() == [11.0, 10.0, 12.0]
+
+    args = argparse.Namespace(cruise='PS122_1', instrument='scaw1', duplicates='first')
+    assert reprint_radiation_SCAWS.handle_duplicates(args, df.copy())['DSR'].tolist() == [11.0, 10.0]
+
+    args.duplicates = 'last'
+    assert reprint_radiation_SCAWS.handle_duplicates(args, df.copy())['DSR'].tolist() == [11.0, 12.0]
+
+    args.duplicates = 'flag'
+    flagged = reprint_radiation_SCAWS.handle_duplicates(args, df.copy())
+    assert flagged['ok_flag_duplicate'].tolist() == [1, 0, 0]
+
+    # report of the duplicated time
+    report = (tmp_path / 'out' / 'PS122_1_scaw1_duplicates.txt').read_text().splitlines()
+    assert len(report) == 2
+    assert report[1].split('\t')[1] == '2'
+
+
+# daily files of the first days (of three), a record per minute, outliers around noon of the second day
+def write_daily_files(level0_dir, number_days=3, records_day2=1440):
+    rng = np.random.default_rng(1)
+
+    for number, day in enumerate( ['2019-10-06', '2019-10-07', '2019-10-08'][:number_days] ):
+        lines = []
+        for i in range(1440 if number != 1 else records_day2):
+            time = np.datetime64(day) + np.timedelta64(60 * i, 's')
+            dsr = 100.0 + 50.0 * np.sin(i / 100.0) + rng.normal()
+            if number == 1 and i in (700, 730):
+                dsr = dsr + 500.0
+            lines.append( scaw1_line( str(time).replace('T', ' '), round(69.0 + i * 1e-4, 5), 19.0, round(dsr, 3), round(300.0 + 10.0 * np.cos(i / 50.0), 3) ) )
+
+        with open( os.path.join( level0_dir, 'SCAWS_1-data-saved-on-' + day.replace('-', '') ), 'w' ) as f:
+            f.writelines(lines)
+
+
+# config of the mission/instrument as built by get_toml_config
+def get_config(tmp_path):
+    dates = [ datetime(2019, 10, day, tzinfo=timezone.utc) for day in (6, 7, 8) ]
+
+    instrument = {
+        'path_level0_fix' : str(tmp_path / 'level0') + '/',
+        'path_filenames_level0' : "date.strftime('SCAWS_1-data-saved-on-%Y%m%d')",
+        'path_level1a_csv' : str(tmp_path / 'level1a') + '/',
+    }
+    instrument['_path_filenames_level0'] = [ get_toml_config.get_level0_pattern(instrument, date) for date in dates ]
+
+    return { 'instruments' : [ { 'scaw1' : instrument } ], 'mission' : { 'PS122_1' : { '_' : { 'dates' : dates } } } }
+
+
+# process the cruise in a working directory (output to out/)
+def run_main(work_dir, config, options):
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+
+    args = reprint_radiation_SCAWS.get_parser().parse_args( [ '-c', 'PS122_1', '-i', 'scaw1', '--rolling_window', '3600', '--no_cache' ] + options )
+    assert reprint_radiation_SCAWS.main(args, config) == 0
+
+    return os.path.join(work_dir, 'out', 'PS122_1_scaw1.nc')
+
+
+def read_variables(nc_file):
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        return { name : np.ma.filled( dataset[name][:], np.nan ) for name in dataset.variables }
+
+
+def test_update_equals_full_processing(tmp_path, monkeypatch):
+    (tmp_path / 'level0').mkdir()
+    (tmp_path / 'level1a').mkdir()
+    config = get_config(tmp_path)
+
+    # first run with the second day until 11:59 (current day), update after the days are complete
+    write_daily_files( str(tmp_path / 'level0'), number_days=2, records_day2=720 )
+    first = read_variables( run_main( str(tmp_path / 'update'), config, [] ) )
+
+    write_daily_files( str(tmp_path / 'level0') )
+    update_file = run_main( str(tmp_path / 'update'), config, [ '--update' ] )
+
+    full_file = run_main( str(tmp_path / 'full'), config, [] )
+    monkeypatch.chdir(tmp_path)
+
+    update = read_variables(update_file)
+    full = read_variables(full_file)
+
+    assert len(full['time']) == 3 * 1440
+    np.testing.assert_array_equal( update['time'], full['time'] )
+
+    for name in full:
+        if name.startswith('ok_flag'):
+            np.testing.assert_array_equal( update[name], full[name], err_msg=name )
+        else:
+            np.testing.assert_allclose( update[name], full[name], rtol=1e-5, atol=1e-3, err_msg=name )
+
+    # the outlier before the end of the first run is not flagged with the complete window (second outlier),
+    # the flag of the existing record is recomputed by the update
+    assert first['ok_flag_dsr_outlier'][1440 + 700] == 0
+    assert full['ok_flag_dsr_outlier'][1440 + 700] == 1
+
+    # overview levels of the update equal a new overview
+    with netCDF4.Dataset( scaws_overview.get_overview_file(update_file), 'r' ) as updated, netCDF4.Dataset( scaws_overview.get_overview_file(full_file), 'r' ) as rebuilt:
+        for level in scaws_overview.OVERVIEW_LEVELS:
+            name = scaws_overview.get_group_name(level)
+            for variable in [ 'time', 'count', 'DSR_mean', 'ok_flag_dsr_outlier_flagged' ]:
+                np.testing.assert_allclose( updated[name][variable][:], rebuilt[name][variable][:], rtol=1e-5, err_msg=name + ' ' + variable )
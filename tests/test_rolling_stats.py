@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import rolling_stats
+
+
+# reference: mean/std of the records within [t - window/2, t + window/2], NaN not counted
+def brute_force_mean_std(times, values, window):
+    mean = np.empty( len(times) )
+    std = np.empty( len(times) )
+    for i, t in enumerate(times):
+        inside = values[ (times >= t - window // 2) & (times <= t + window // 2) ]
+        inside = inside[ ~np.isnan(inside) ]
+        mean[i] = inside.mean()
+        std[i] = inside.std()
+
+    return mean, std
+
+
+def test_rolling_mean_std_equals_brute_force():
+    rng = np.random.default_rng(0)
+
+    # 1 Hz records with a gap, large offset (radiation in W/m2), NaN values
+    times = np.concatenate( ( np.arange(0, 500), np.arange(800, 1200) ) ).astype(np.int64) * 10**9
+    dsr = 400.0 + 5.0 * rng.normal( size=len(times) )
+    dsr[ [3, 100, 650] ] = np.nan
+    dlr = 300.0 + np.sin( np.arange( len(times) ) / 30.0 )
+
+    window = 61 * 10**9
+    stats = rolling_stats.rolling_mean_std( times, { 'DSR' : dsr, 'DLR' : dlr }, window )
+
+    for name, values in [ ('DSR', dsr), ('DLR', dlr) ]:
+        mean, std = brute_force_mean_std(times, values, window)
+        np.testing.assert_allclose( stats[name][0], mean, rtol=1e-12 )
+        np.testing.assert_allclose( stats[name][1], std, rtol=1e-8, atol=1e-9 )
+
+
+def test_rolling_mean_std_unsorted_times_keep_record_order():
+    times = np.array( [2, 0, 1, 10], dtype=np.int64 )
+    values = np.array( [3.0, 1.0, 2.0, 7.0] )
+
+    mean, std = rolling_stats.rolling_mean_std( times, { 'DSR' : values }, 2 )['DSR']
+
+    # windows [t - 1, t + 1]
+    np.testing.assert_allclose( mean, [2.5, 1.5, 2.0, 7.0] )
+    np.testing.assert_allclose( std, [0.5, 0.5, np.std([1.0, 2.0, 3.0]), 0.0] )
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+netCDF4 = pytest.importorskip('netCDF4')
+
+import numpy as np
+
+import scaws_overview
+
+
+# netcdf file of records every 20 s, flags of an older version (without ok_flag_duplicate)
+def write_nc_file(nc_file, number_records=9):
+    with netCDF4.Dataset(nc_file, 'w') as dataset:
+        dataset.createDimension('time', None)
+        time = dataset.createVariable('time', 'f8', ('time',))
+        time.units = 'seconds since 2019-10-06 00:00:00'
+        time[:] = np.arange(number_records) * 20.0
+
+        for name in scaws_overview.OVERVIEW_VARIABLES:
+            dataset.createVariable(name, 'f4', ('time',))[:] = np.arange(number_records, dtype=np.float32)
+
+        for name in ['ok_flag_dsr_sun_zen', 'ok_flag_dsr_outlier', 'ok_flag_dlr_outlier']:
+            dataset.createVariable(name, 'i1', ('time',))[:] = np.ones(number_records, dtype=np.int8)
+
+        dataset['ok_flag_dsr_outlier'][4] = 0
+
+
+def test_overview_file_without_duplicate_flag(tmp_path):
+    nc_file = str(tmp_path / 'PS122_1_scaw1.nc')
+    write_nc_file(nc_file)
+
+    times, data, time_units = scaws_overview.read_nc_records(nc_file)
+    assert data['ok_flag_duplicate'].tolist() == [1] * 9
+
+    overview_file = scaws_overview.update_overview_file(nc_file)
+
+    with netCDF4.Dataset(overview_file, 'r') as dataset:
+        group = dataset[ scaws_overview.get_group_name(60) ]
+
+        # bins of 60 s: records 0-2, 3-5, 6-8
+        assert group['count'][:].tolist() == [3, 3, 3]
+        assert group['DSR_mean'][:].tolist() == [1.0, 4.0, 7.0]
+        assert group['DSR_min'][:].tolist() == [0.0, 3.0, 6.0]
+        assert group['DSR_max'][:].tolist() == [2.0, 5.0, 8.0]
+        assert group['ok_flag_dsr_outlier_flagged'][:].tolist() == [0, 1, 0]
+        assert group['ok_flag_duplicate_flagged'][:].tolist() == [0, 0, 0]
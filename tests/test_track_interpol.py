@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+import track_interpol
+
+
+def test_cubic_polynomial_is_reproduced_inside_the_track():
+    # Hermite segments with central secant slopes reproduce a quadratic exactly
+    x = np.linspace(0.0, 100.0, 51)
+    y = 0.01 * x**2 - x + 5.0
+
+    f = track_interpol.local_cubic_interpolator(x, y)
+
+    xq = np.linspace(2.0, 98.0, 997)
+    np.testing.assert_allclose( f(xq), 0.01 * xq**2 - xq + 5.0, atol=1e-10 )
+
+    # track points are reproduced, outside of the track NaN
+    np.testing.assert_allclose( f(x), y, atol=1e-12 )
+    assert np.isnan( f([-0.1, 100.1]) ).all()
+
+
+def test_gaps_nan_and_unsorted_track():
+    x = np.array( [0.0, 10.0, 30.0, 20.0, 100.0, 110.0, 120.0] )
+    y = np.array( [0.0, 1.0, 3.0, 2.0, 10.0, np.nan, 12.0] )
+
+    f = track_interpol.local_cubic_interpolator(x, y, max_gap=15.0, chunksize=2)
+
+    # linear track: the cubic segments are linear, within the gap 30-100 NaN
+    values = f( np.array( [5.0, 25.0, 50.0, 99.0, 105.0] ) )
+    np.testing.assert_allclose( values[:2], [0.5, 2.5] )
+    assert np.isnan( values[2:4] ).all()
+
+    # the NaN point is not used: segment 100-120 is larger than max_gap
+    assert np.isnan( values[4] )
+
+
+def test_extended_interpolator_equals_interpolator_of_the_complete_track():
+    rng = np.random.default_rng(2)
+    x = np.cumsum( rng.uniform(1.0, 5.0, size=200) )
+    y = np.cumsum( rng.normal(size=200) )
+
+    f_full = track_interpol.local_cubic_interpolator(x, y, max_gap=4.5)
+
+    f = track_interpol.local_cubic_interpolator(x[:1], y[:1], max_gap=4.5)
+    for first, last in [ (1, 2), (2, 3), (3, 57), (57, 58), (58, 200) ]:
+        track_interpol.extend_interpolator( f, x[first:last], y[first:last] )
+
+    # points before the end of the track are not used
+    track_interpol.extend_interpolator( f, x[:10], y[:10] + 1.0 )
+
+    xq = np.linspace( x[0] - 1.0, x[-1] + 1.0, 5000 )
+    np.testing.assert_allclose( f(xq), f_full(xq), rtol=1e-12, equal_nan=True )